@@ -1,14 +1,19 @@
 import streamlit as st
-import google.generativeai as genai
-import re
-import json
-from joblegitchecker2 import JobLegitimacyChecker
+from model_registry import get_registry
+from llm_cache import get_llm_cache
+from orchestrator import analyze_posting_stream
+from near_duplicates import get_near_duplicate_index
+from result_store import get_result_store
+from decision_cascade import get_decision_cascade
+from instrumentation import start_metrics_server_from_env
 import os
 
 # Configure Generative AI
 def setup_generative_ai(api_key):
     if not api_key:
         raise ValueError("GEMINI_API_KEY not found. Please set it in Streamlit secrets or .env file.")
+    # Imported here: the SDK takes seconds to import and the page doesn't need it to render
+    import google.generativeai as genai
     genai.configure(api_key=api_key)
     model = genai.GenerativeModel('gemini-2.5-pro')
     return model
@@ -21,6 +26,19 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
+def get_api_key():
+    try:
+        return st.secrets.get("GEMINI_API_KEY") or os.getenv("GEMINI_API_KEY")
+    except Exception:
+        # No secrets.toml configured
+        return os.getenv("GEMINI_API_KEY")
+
+# Shared across sessions; the model artifacts and LLM client load in the background while the
+# first page renders, and later runs reuse them
+registry = get_registry()
+registry.warm_in_background(api_key=get_api_key(), llm_factory=setup_generative_ai)
+start_metrics_server_from_env()
+
 # Custom CSS styling - Neon Cyberpunk Theme
 st.markdown("""
     <style>
@@ -138,6 +156,32 @@ st.markdown("""
     </style>
     """, unsafe_allow_html=True)
 
+def render_verdict(verdict_slot, score_slot, prediction, confidence):
+    # Placeholders are redrawn as the streamed verdict firms up; confidence is None until the model states it
+    shown = "--" if confidence is None else confidence
+    with verdict_slot.container():
+        if prediction.lower() == "legitimate":
+            st.success("✅ Job Appears Legitimate")
+            st.markdown(f'<span class="neon-badge">LEGITIMATE — Confidence: {shown}%</span>', unsafe_allow_html=True)
+        elif prediction.lower() == "suspicious":
+            st.warning("⚠️ Potential Job Scam Detected")
+            risk = "--" if confidence is None else 100 - confidence
+            st.markdown(f'<span class="neon-badge">SUSPICIOUS — Risk: {risk}%</span>', unsafe_allow_html=True)
+        else:
+            st.error("⚠️ Unable to determine legitimacy.")
+            st.markdown(f'<span class="neon-badge">UNKNOWN — Confidence: {shown}%</span>', unsafe_allow_html=True)
+
+    with score_slot.container():
+        # Confidence score display
+        st.markdown(f'<div class="confidence-score">Confidence Score: {shown}%</div>', unsafe_allow_html=True)
+
+        # Animated score bar
+        st.markdown(f"""
+            <div class="score-bar">
+                <div class="score-fill" style="width:{confidence or 0}%;"></div>
+            </div>
+            """, unsafe_allow_html=True)
+
 # Main functionality
 def main(): 
     # Neon Title Banner
@@ -165,176 +209,70 @@ def main():
             return
 
         try:
-            # Initialize services
-            job_verifier = JobLegitimacyChecker()
+            # Reuse the warm, process-wide services
+            job_verifier = registry.get_checker()
             
             # Setup Generative AI with validation
-            api_key = st.secrets.get("GEMINI_API_KEY") or os.getenv("GEMINI_API_KEY")
+            api_key = get_api_key()
             if not api_key:
                 st.error("⚠️ GEMINI_API_KEY not configured. Please set it in Streamlit Secrets or .env file.")
                 return
                 
-            gemini_model = setup_generative_ai(api_key)
-
-            # Run checks
-            validate_url = job_verifier.validate_url(job_url)
-            desc_analysis = job_verifier.analyze_job_description(job_description)
-            in_verified_job_board = job_verifier.verify_job_source(job_url)
-
-            # Prepare ML prediction data
-            ml_data = {
-                "title": job_title,
+            gemini_model = registry.get_llm(api_key, setup_generative_ai)
+
+            # Run the local checks concurrently and give the LLM a deadline
+            job = {
+                "company_name": company_name,
+                "job_title": job_title,
+                "job_description": job_description,
+                "job_url": job_url,
                 "company_profile": company_profile,
-                "description": job_description,
                 "requirements": requirements,
                 "benefits": benefits,
             }
-            ml_prediction = job_verifier.preprocess_and_predict(ml_data)
-
-            # Format red flags for prompt
-            red_flags_display = ", ".join(desc_analysis["red_flag_matches"]) if desc_analysis["red_flag_matches"] else "None detected"
-
-            # Comprehensive analysis prompt (original plain-text)
-            prompt = f"""Carefully analyze this job posting for legitimacy:
-
-Job Details:
-- Job Title: {job_title}
-- Company: {company_name}
-- Job URL: {job_url}
-
-Technical Verification:
-- URL Validation: {validate_url}
-- Verified Job Board: {in_verified_job_board}
-
-Risk Indicators:
-- Red Flags Detected: {desc_analysis.get('red_flag_count', 0)}
-- Suspicious Patterns: {desc_analysis.get('suspicious_pattern_count', 0)}
-- Calculated Risk Score: {desc_analysis.get('risk_score', 0)}
-
-Machine Learning Prediction: {'Legitimate' if ml_prediction == 1 else 'Suspicious'}
-
-Comprehensive Analysis Request:
-1. Provide a detailed assessment of the job posting's legitimacy.
-2. Explain the reasoning behind your assessment.
-3. Generate a confidence percentage (0-100%) based on the strength of evidence.
-    - If there is a strong undeniable negative indicator  (e.g., Gibberish), the confidence should be 0%. DO NOT increase confidence if there are no strong positive indicators.
-    - If the prediction is LEGITIMATE, the confidence should naturally tend towards a higher percentage (reflecting higher certainty)
-    - If the prediction is SUSPICIOUS, the confidence should naturally tend towards a lower percentage (reflecting lower certainty)
-4. Highlight specific red flags or positive indicators.
-5. Recommend actions for the job seeker.
-
-Output Format:
-    Prediction: [Legitimate/Suspicious]
-
-    Confidence: [XX%]
-
-    Explanation: [Your detailed reasoning here]
-
-    Your response should be Accurate, Clear, Concise and straight to the point. 
-    Your tone should be friendly but professional.
-"""
-
-            # Generate analysis
-            response = gemini_model.generate_content(prompt)
-            response_text = response.text
-            
-            # Try to parse a JSON object from the model response first (preferred)
-            confidence = None
-            prediction = "Unknown"
-            positive_indicators = []
-            negative_indicators = []
-            explanation = response_text
-
-            # Look for the first JSON object in the response
-            json_obj = None
-            m = re.search(r"(\{[\s\S]*\})", response_text)
-            if m:
-                try:
-                    json_obj = json.loads(m.group(1))
-                except Exception:
-                    json_obj = None
-
-            if json_obj:
-                # Safely extract fields
-                prediction = str(json_obj.get("prediction", "Unknown")).capitalize()
-                try:
-                    confidence = int(json_obj.get("confidence", 0))
-                except Exception:
-                    confidence = 0
-                positive_indicators = json_obj.get("positive_indicators", []) or []
-                negative_indicators = json_obj.get("negative_indicators", []) or []
-                explanation = json_obj.get("explanation", explanation)
-                # Enforce confidence bounds
-                confidence = max(0, min(100, confidence))
-                # Enforce critical rule: if Calculated Risk Score >=50 or obvious negatives present, force 0
-                obvious_negative_terms = ["pay_upfront","wire_transfer","western_union","money_gram","no_interview","no_experience","guaranteed_income","bank_details","upfront_fee","bitcoin","crypto","send_money"]
-                if desc_analysis.get('risk_score', 0) >= 50 or any(term in ",".join(negative_indicators).lower() for term in obvious_negative_terms):
-                    confidence = 0
-                    prediction = "Suspicious"
-            else:
-                # Fallback to regex extraction if JSON not provided
-                prediction_match = re.search(r'Prediction:\s*(Legitimate|Suspicious)', response_text, re.IGNORECASE)
-                confidence_match = re.search(r'Confidence:\s*(\d+)\s*%', response_text, re.IGNORECASE)
-                prediction = prediction_match.group(1).capitalize() if prediction_match else "Unknown"
-                if confidence_match:
-                    confidence = int(confidence_match.group(1))
-                    confidence = max(0, min(100, confidence))
-                else:
-                    # Fallback heuristic: derive confidence from risk_score
-                    risk_score = desc_analysis.get('risk_score', 0)
-                    if prediction.lower() == "suspicious":
-                        confidence = 0 if risk_score >= 50 else max(10, 50 - (risk_score // 2))
-                    elif prediction.lower() == "legitimate":
-                        # Only increase confidence when there are positive indicators
-                        pos = []
-                        if in_verified_job_board:
-                            pos.append('verified_job_board')
-                        if desc_analysis.get('red_flag_count', 0) == 0 and desc_analysis.get('suspicious_pattern_severity', 0) == 0:
-                            pos.append('no_flags')
-                        confidence = 60 + min(40, len(pos) * 20)
-                    else:
-                        confidence = 50
-
-            # Ensure final safety bounds
-            if confidence is None:
-                confidence = 0
-            confidence = int(max(0, min(100, confidence)))
 
             # Display results
             st.markdown('<div class="section-header"> ANALYSIS RESULTS</div>', unsafe_allow_html=True)
+            notice_slot = st.empty()
 
             # Prediction visualization with neon badge
             col1, col2 = st.columns(2)
-            
             with col1:
-                if prediction.lower() == "legitimate":
-                    st.success("✅ Job Appears Legitimate")
-                    st.markdown(f'<span class="neon-badge">LEGITIMATE — Confidence: {confidence}%</span>', unsafe_allow_html=True)
-                    confidence_color = "green"
-                elif prediction.lower() == "suspicious":
-                    st.warning("⚠️ Potential Job Scam Detected")
-                    st.markdown(f'<span class="neon-badge">SUSPICIOUS — Risk: {100-confidence}%</span>', unsafe_allow_html=True)
-                    confidence_color = "red"
-                else:
-                    st.error("⚠️ Unable to determine legitimacy.")
-                    st.markdown(f'<span class="neon-badge">UNKNOWN — Confidence: {confidence}%</span>', unsafe_allow_html=True)
-                    confidence_color = "gray"
-
+                verdict_slot = st.empty()
             with col2:
-                # Confidence score display
-                st.markdown(f'<div class="confidence-score">Confidence Score: {confidence}%</div>', unsafe_allow_html=True)
-                
-                # Animated score bar
-                st.markdown(f"""
-                    <div class="score-bar">
-                        <div class="score-fill" style="width:{confidence}%;"></div>
-                    </div>
-                    """, unsafe_allow_html=True)
+                score_slot = st.empty()
 
             # Explanation section with expander
             with st.expander("Detailed Analysis", expanded=True):
                 st.markdown('<div class="section-header">Detailed Thoughts</div>', unsafe_allow_html=True)
-                st.write(response_text)  # Display the explanation directly
+                text_slot = st.empty()
+
+            # The LLM response is rendered as it streams; the final parse (with override rules) replaces it
+            with st.spinner("Analyzing..."):
+                for event in analyze_posting_stream(job_verifier, job, llm=gemini_model,
+                                                    stream=get_llm_cache().generate_stream,
+                                                    near_duplicates=get_near_duplicate_index(),
+                                                    result_store=get_result_store(),
+                                                    cascade=get_decision_cascade()):
+                    if event["event"] == "chunk":
+                        text_slot.write(event["response_text"])
+                        if event["prediction"] is not None:
+                            render_verdict(verdict_slot, score_slot, event["prediction"], event["confidence"])
+                    else:
+                        result = event["result"]
+
+            if result.get("from_store"):
+                notice_slot.info("This exact posting was analyzed before with the current model and rules; showing the saved result.")
+            elif result.get("duplicate_of"):
+                notice_slot.info(f"This posting is a near-duplicate ({result['similarity']:.0%} similar) of one analyzed earlier; reusing that verdict.")
+            elif result["resolved_by"] == "rules":
+                notice_slot.info("The rule checks were conclusive, so the AI assessment was skipped.")
+            elif result["resolved_by"] == "ml":
+                notice_slot.info("The ML model was confident, so the AI assessment was skipped.")
+            if result["llm_timed_out"]:
+                notice_slot.info("The AI assessment took too long; showing the rule-based and ML verdict instead.")
+            render_verdict(verdict_slot, score_slot, result["prediction"], result["confidence"])
+            text_slot.write(result["response_text"])  # Display the explanation directly
 
         except ValueError as ve:
             st.error(f"⚠️ Configuration Error: {str(ve)}")
@@ -0,0 +1,123 @@
+"""Per-stage benchmark of the analysis pipeline on synthetic postings.
+
+    python benchmark.py --save benchmark_baseline.json
+    python benchmark.py --compare benchmark_baseline.json --threshold 0.25
+
+Each stage is timed separately for every posting kind (short, long, scam,
+adversarial). ``--compare`` exits with status 1 when a stage's p50 latency
+is more than ``threshold`` slower than in the baseline.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from llm_analysis import parse_response
+from orchestrator import ml_input
+from synthetic_postings import KINDS, generate_llm_responses, generate_postings
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def time_calls(func: Callable[[Any], Any], inputs: List[Any], warmup: int = 3) -> Dict[str, float]:
+    for item in inputs[:warmup]:
+        func(item)
+    latencies = []
+    started = time.perf_counter()
+    for item in inputs:
+        call_started = time.perf_counter()
+        func(item)
+        latencies.append(time.perf_counter() - call_started)
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "calls": len(inputs),
+        "throughput_per_s": len(inputs) / elapsed if elapsed else 0.0,
+        "p50_us": percentile(latencies, 0.50) * 1e6,
+        "p95_us": percentile(latencies, 0.95) * 1e6,
+        "p99_us": percentile(latencies, 0.99) * 1e6,
+    }
+
+
+def run_benchmarks(checker, count: int = 200, seed: int = 0) -> Dict[str, Dict[str, float]]:
+    results: Dict[str, Dict[str, float]] = {}
+    for kind in KINDS:
+        postings = list(generate_postings(count, kind, seed))
+        urls = [posting["job_url"] for posting in postings]
+        results[f"validate_url/{kind}"] = time_calls(checker.validate_url, urls)
+        results[f"verify_job_source/{kind}"] = time_calls(checker.verify_job_source, urls)
+        results[f"analyze_job_description/{kind}"] = time_calls(
+            checker.analyze_job_description, [posting["job_description"] for posting in postings])
+        results[f"preprocess_and_predict/{kind}"] = time_calls(
+            checker.preprocess_and_predict, [ml_input(posting) for posting in postings])
+
+    desc_analysis = {"red_flag_count": 1, "red_flag_matches": ["asap"], "suspicious_pattern_count": 1,
+                     "suspicious_pattern_severity": 2, "risk_score": 35}
+    results["parse_response"] = time_calls(
+        lambda text: parse_response(text, desc_analysis, False), generate_llm_responses(count, seed))
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            threshold: float, metric: str = "p50_us", min_delta_us: float = 1.0) -> List[str]:
+    """Return a message for every stage slower than the baseline by more than ``threshold``.
+
+    Differences below ``min_delta_us`` are timer noise on sub-microsecond stages and are ignored.
+    """
+    regressions = []
+    for stage, stats in results.items():
+        reference = baseline.get(stage, {}).get(metric)
+        if not reference:
+            continue
+        change = stats[metric] / reference - 1.0
+        if change > threshold and stats[metric] - reference >= min_delta_us:
+            regressions.append(f"{stage}: {metric} {reference:,.1f} -> {stats[metric]:,.1f} (+{change:.0%})")
+    return regressions
+
+
+def print_report(results: Dict[str, Dict[str, float]], out=sys.stdout) -> None:
+    out.write(f"{'stage':<40}{'ops/s':>12}{'p50 us':>12}{'p95 us':>12}{'p99 us':>12}\n")
+    for stage, stats in results.items():
+        out.write(f"{stage:<40}{stats['throughput_per_s']:>12,.0f}{stats['p50_us']:>12,.1f}"
+                  f"{stats['p95_us']:>12,.1f}{stats['p99_us']:>12,.1f}\n")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark each stage of the job analysis pipeline.")
+    parser.add_argument("--count", type=int, default=200, help="postings per kind")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", metavar="PATH", help="write results as a baseline JSON file")
+    parser.add_argument("--compare", metavar="PATH", help="baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown as a fraction of the baseline (default 0.25)")
+    parser.add_argument("--metric", default="p50_us", choices=["p50_us", "p95_us", "p99_us"])
+    args = parser.parse_args(argv)
+
+    from joblegitchecker2 import JobLegitimacyChecker
+    results = run_benchmarks(JobLegitimacyChecker(), args.count, args.seed)
+    print_report(results)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as handle:
+            json.dump({"python": platform.python_version(), "count": args.count, "stages": results},
+                      handle, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            baseline = json.load(handle)["stages"]
+        regressions = compare(results, baseline, args.threshold, args.metric)
+        if regressions:
+            print("\nRegressions:\n  " + "\n  ".join(regressions))
+            return 1
+        print(f"\nNo stage regressed more than {args.threshold:.0%} on {args.metric}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
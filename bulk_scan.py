@@ -0,0 +1,242 @@
+"""Offline bulk scan of job postings from CSV or JSONL.
+
+    python bulk_scan.py postings.csv results.jsonl --workers 4 --chunk-size 500
+    python bulk_scan.py postings.jsonl results.jsonl --llm stub --resume
+    python bulk_scan.py postings.csv results.jsonl --llm gemini --llm-batch-size 8 --llm-rpm 60
+
+Postings are streamed in chunks to a pool of worker processes, each of which
+loads the model once. Results are written as JSONL in input order, and a
+checkpoint file next to the output lets an interrupted run continue with
+``--resume``. The LLM stage runs in the parent process through one
+LLMScheduler, so its rate limits hold across all workers. Only Gemini is
+rate limited, and only when ``--llm-rpm`` or ``GEMINI_RPM`` sets a quota;
+the local stub runs at full speed.
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from llm_analysis import StubLLM
+from llm_scheduler import LLMScheduler
+from orchestrator import fallback_verdict, ml_input
+
+# Column names accepted for each posting field (the app's names first, then the Kaggle dataset's)
+FIELD_ALIASES = {
+    "job_id": ("job_id", "id"),
+    "job_title": ("job_title", "title"),
+    "company_name": ("company_name", "company"),
+    "job_description": ("job_description", "description"),
+    "job_url": ("job_url", "url"),
+    "company_profile": ("company_profile",),
+    "requirements": ("requirements",),
+    "benefits": ("benefits",),
+}
+
+_checker = None
+
+
+def posting_from_row(row: Dict[str, Any], row_number: Optional[int] = None) -> Dict[str, str]:
+    """Posting fields from an input row; without an id column, ``job_id`` is the 0-based ``row_number``."""
+    posting = {}
+    for field, aliases in FIELD_ALIASES.items():
+        value = next((row[alias] for alias in aliases if row.get(alias) not in (None, "")), "")
+        posting[field] = str(value)
+    if not posting["job_id"] and row_number is not None:
+        posting["job_id"] = str(row_number)
+    return posting
+
+
+def _read_rows(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, newline="", encoding="utf-8") as handle:
+        if path.endswith((".jsonl", ".ndjson")):
+            for line in handle:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            csv.field_size_limit(sys.maxsize)
+            yield from csv.DictReader(handle)
+
+
+def read_postings(path: str) -> Iterator[Dict[str, str]]:
+    # Streams one row at a time; never holds the whole file. Rows are numbered the way
+    # --resume counts them, so fallback ids stay the same across resumed runs
+    for row_number, row in enumerate(_read_rows(path)):
+        yield posting_from_row(row, row_number)
+
+
+def _init_worker(tfidf_path: str, model_path: str) -> None:
+    global _checker
+    from joblegitchecker2 import JobLegitimacyChecker
+    _checker = JobLegitimacyChecker(tfidf_path, model_path)
+
+
+def _llm_rate_limit(llm_mode: str, llm_rpm: Optional[float]) -> Optional[float]:
+    # Requests per minute for the scheduler; None means unlimited
+    if llm_mode != "gemini":
+        return None
+    if llm_rpm is None and os.getenv("GEMINI_RPM"):
+        llm_rpm = float(os.environ["GEMINI_RPM"])
+    return llm_rpm or None
+
+
+def _make_llm(llm_mode: str) -> Any:
+    if llm_mode == "stub":
+        return StubLLM()
+    if llm_mode == "gemini":
+        import google.generativeai as genai
+        genai.configure(api_key=os.environ["GEMINI_API_KEY"])
+        return genai.GenerativeModel(os.getenv("GEMINI_MODEL", "gemini-2.5-pro"))
+    return None
+
+
+def _score_chunk(postings: List[Dict[str, str]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    # Local checks only; returns the rows (with the fallback verdict) and the LLM tasks for them
+    predictions, probabilities = _checker.predict_many([ml_input(posting) for posting in postings])
+    analyses = _checker.analyze_many([posting["job_description"] for posting in postings])
+    results, tasks = [], []
+    for posting, ml_prediction, probability, desc_analysis in zip(postings, predictions, probabilities, analyses):
+        checks = {
+            "validate_url": _checker.validate_url(posting["job_url"]),
+            "in_verified_job_board": _checker.verify_job_source(posting["job_url"]),
+            "source_verdict": _checker.source_verdict(posting["job_url"]),
+            "desc_analysis": desc_analysis,
+            "ml_prediction": int(ml_prediction),
+        }
+        verdict = fallback_verdict(checks)
+        tasks.append({"job": posting, "checks": checks})
+        results.append({
+            "job_id": posting["job_id"],
+            "prediction": verdict["prediction"],
+            "confidence": verdict["confidence"],
+            "ml_prediction": checks["ml_prediction"],
+            "ml_probability": None if math.isnan(probability) else float(probability),
+            "risk_score": desc_analysis["risk_score"],
+            "red_flag_matches": desc_analysis["red_flag_matches"],
+            "validate_url": checks["validate_url"],
+            "in_verified_job_board": checks["in_verified_job_board"],
+            "source_verdict": checks["source_verdict"],
+        })
+    return results, tasks
+
+
+def _chunks(postings: Iterator[Dict[str, str]], size: int) -> Iterator[List[Dict[str, str]]]:
+    while True:
+        chunk = list(islice(postings, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _load_checkpoint(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_checkpoint(path: str, state: Dict[str, Any]) -> None:
+    # Write-then-rename so a crash never leaves a half-written checkpoint
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump(state, handle)
+    os.replace(tmp_path, path)
+
+
+def scan(input_path: str, output_path: str, workers: int = os.cpu_count() or 1, chunk_size: int = 500,
+         llm_mode: str = "none", resume: bool = False, tfidf_path: str = "tfidf_vectorizer.pkl",
+         model_path: str = "model.pkl", checkpoint_path: Optional[str] = None, progress=sys.stderr,
+         llm_batch_size: int = 1, llm_rpm: Optional[float] = None, llm_concurrency: int = 4) -> int:
+    """Scan ``input_path`` into ``output_path``; returns the number of rows written by this run.
+
+    ``llm_rpm`` caps Gemini requests per minute (default ``GEMINI_RPM``, else
+    no cap); the stub is never rate limited.
+    """
+    llm = _make_llm(llm_mode)
+    scheduler = (LLMScheduler(llm, batch_size=llm_batch_size, max_concurrency=llm_concurrency,
+                              requests_per_minute=_llm_rate_limit(llm_mode, llm_rpm))
+                 if llm is not None else None)
+    checkpoint_path = checkpoint_path or output_path + ".checkpoint"
+    rows_done, output_bytes = 0, 0
+    state = _load_checkpoint(checkpoint_path) if resume else None
+    if state and state.get("input") == os.path.abspath(input_path):
+        rows_done, output_bytes = state["rows_done"], state["output_bytes"]
+
+    postings = read_postings(input_path)
+    for _ in islice(postings, rows_done):
+        pass
+
+    with open(output_path, "a+b" if rows_done else "wb") as output:
+        # Drop anything written after the last checkpoint
+        output.truncate(output_bytes)
+        output.seek(output_bytes)
+        written = 0
+        started = time.monotonic()
+        # Bounded number of chunks in flight keeps memory flat regardless of file size
+        pending = deque()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(tfidf_path, model_path)) as pool:
+            chunks = _chunks(postings, chunk_size)
+            while True:
+                while len(pending) < workers * 2:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        break
+                    pending.append(pool.submit(_score_chunk, chunk))
+                if not pending:
+                    break
+                results, tasks = pending.popleft().result()
+                if scheduler is not None:
+                    for row, verdict in zip(results, scheduler.analyze(tasks)):
+                        row.update(prediction=verdict["prediction"], confidence=verdict["confidence"])
+                        if "llm_error" in verdict:
+                            row["llm_error"] = verdict["llm_error"]
+                output.write("".join(json.dumps(r) + "\n" for r in results).encode("utf-8"))
+                output.flush()
+                written += len(results)
+                _save_checkpoint(checkpoint_path, {
+                    "input": os.path.abspath(input_path),
+                    "rows_done": rows_done + written,
+                    "output_bytes": output.tell(),
+                })
+                elapsed = time.monotonic() - started
+                if progress is not None:
+                    progress.write(f"\r{rows_done + written} rows  {written / elapsed if elapsed else 0.0:,.0f} rows/s")
+                    progress.flush()
+    if progress is not None:
+        progress.write("\n")
+    return written
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk-scan job postings from CSV or JSONL.")
+    parser.add_argument("input", help="CSV or JSONL (.jsonl/.ndjson) file of postings")
+    parser.add_argument("output", help="JSONL file to write results to")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--llm", choices=["none", "stub", "gemini"], default="none",
+                        help="LLM stage: skipped, local stub, or Gemini (needs GEMINI_API_KEY)")
+    parser.add_argument("--llm-batch-size", type=int, default=1, help="postings per LLM prompt")
+    parser.add_argument("--llm-rpm", type=float, default=None,
+                        help="Gemini requests per minute (default: GEMINI_RPM, else unlimited)")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="LLM requests in flight")
+    parser.add_argument("--resume", action="store_true", help="continue from the output's checkpoint")
+    parser.add_argument("--tfidf-path", default="tfidf_vectorizer.pkl")
+    parser.add_argument("--model-path", default="model.pkl")
+    args = parser.parse_args(argv)
+    scan(args.input, args.output, workers=args.workers, chunk_size=args.chunk_size, llm_mode=args.llm,
+         resume=args.resume, tfidf_path=args.tfidf_path, model_path=args.model_path,
+         llm_batch_size=args.llm_batch_size, llm_rpm=args.llm_rpm, llm_concurrency=args.llm_concurrency)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
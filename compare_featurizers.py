@@ -0,0 +1,145 @@
+"""Compare the pickled TF-IDF featurizer with hashing + incremental training.
+
+    python compare_featurizers.py fake_job_postings.csv
+    python compare_featurizers.py --synthetic 2000
+
+Both pipelines are trained on the same split of a labelled CSV/JSONL
+(``fraudulent`` column as in the Kaggle dataset, or ``label`` with
+1 = Legitimate) and report serialized artifact size, peak Python memory
+while fitting, fit and predict time, and held-out accuracy / F1 for the
+Suspicious class.
+"""
+import argparse
+import csv
+import json
+import pickle
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional, Tuple
+
+from bulk_scan import posting_from_row
+from hashing_model import (CLASSES, evaluate, make_hashing_vectorizer, make_incremental_model,
+                           pickled_size)
+from orchestrator import ml_input
+from synthetic_postings import generate_postings
+from text_preprocessing import preprocess_text
+
+
+def _label_of(row: Dict[str, Any]) -> int:
+    if row.get("label") not in (None, ""):
+        return int(row["label"])
+    return 1 - int(row["fraudulent"])
+
+
+def load_labelled(path: str) -> Tuple[List[Dict[str, str]], List[int]]:
+    postings, labels = [], []
+    with open(path, newline="", encoding="utf-8") as handle:
+        if path.endswith((".jsonl", ".ndjson")):
+            rows = (json.loads(line) for line in handle if line.strip())
+        else:
+            csv.field_size_limit(sys.maxsize)
+            rows = csv.DictReader(handle)
+        for row in rows:
+            postings.append(posting_from_row(row))
+            labels.append(_label_of(row))
+    return postings, labels
+
+
+def synthetic_labelled(count: int, seed: int = 0) -> Tuple[List[Dict[str, str]], List[int]]:
+    # Only exercises the pipeline; synthetic scores say nothing about real accuracy
+    postings, labels = [], []
+    for kind in ("short", "long", "scam"):
+        for posting in generate_postings(count // 3, kind, seed):
+            postings.append(posting)
+            labels.append(0 if kind == "scam" else 1)
+    return postings, labels
+
+
+def _measure(fit, predict) -> Dict[str, Any]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    artifacts = fit()
+    fit_seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    started = time.perf_counter()
+    predictions = predict(artifacts)
+    return {
+        "artifacts": artifacts,
+        "predictions": predictions,
+        "fit_seconds": fit_seconds,
+        "predict_seconds": time.perf_counter() - started,
+        "peak_fit_mb": peak / 1e6,
+        "artifact_mb": sum(pickled_size(artifact) for artifact in artifacts) / 1e6,
+    }
+
+
+def compare(train_texts: List[str], train_labels: List[int], test_texts: List[str], test_labels: List[int],
+            tfidf_path: str = "tfidf_vectorizer.pkl", batch_size: int = 1024) -> Dict[str, Dict[str, Any]]:
+    from sklearn.linear_model import LogisticRegression
+
+    def fit_tfidf():
+        # The shipped vectorizer is refitted so its vocabulary matches the training split
+        with open(tfidf_path, "rb") as vec_file:
+            vectorizer = pickle.load(vec_file)
+        model = LogisticRegression(max_iter=1000)
+        model.fit(vectorizer.fit_transform(train_texts), train_labels)
+        return vectorizer, model
+
+    def fit_hashing():
+        vectorizer = make_hashing_vectorizer()
+        model = make_incremental_model()
+        for start in range(0, len(train_texts), batch_size):
+            model.partial_fit(vectorizer.transform(train_texts[start:start + batch_size]),
+                              train_labels[start:start + batch_size], classes=CLASSES)
+        return vectorizer, model
+
+    def predict(artifacts):
+        vectorizer, model = artifacts
+        return model.predict(vectorizer.transform(test_texts))
+
+    results = {}
+    for name, fit in (("tfidf+logreg", fit_tfidf), ("hashing+sgd", fit_hashing)):
+        measured = _measure(fit, predict)
+        accuracy, f1 = evaluate(measured.pop("predictions"), test_labels)
+        measured.pop("artifacts")
+        results[name] = dict(measured, accuracy=accuracy, f1_suspicious=f1)
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare TF-IDF and hashing featurizers.")
+    parser.add_argument("dataset", nargs="?", help="labelled CSV or JSONL")
+    parser.add_argument("--synthetic", type=int, metavar="COUNT", help="use COUNT synthetic postings instead")
+    parser.add_argument("--tfidf-path", default="tfidf_vectorizer.pkl")
+    parser.add_argument("--test-fraction", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    if not args.dataset and not args.synthetic:
+        parser.error("give a dataset path or --synthetic COUNT")
+
+    postings, labels = (synthetic_labelled(args.synthetic, args.seed) if args.synthetic
+                        else load_labelled(args.dataset))
+    # Same text JobLegitimacyChecker.combine_text builds for the model
+    texts = [" ".join(preprocess_text(value) for value in ml_input(posting).values()) for posting in postings]
+
+    order = list(range(len(texts)))
+    random.Random(args.seed).shuffle(order)
+    split = int(len(order) * (1 - args.test_fraction))
+    train, test = order[:split], order[split:]
+    results = compare([texts[i] for i in train], [labels[i] for i in train],
+                      [texts[i] for i in test], [labels[i] for i in test], args.tfidf_path)
+
+    print(f"{len(train)} train / {len(test)} test postings")
+    print(f"{'pipeline':<14} {'artifact MB':>11} {'peak fit MB':>11} {'fit s':>8} {'predict s':>9} "
+          f"{'accuracy':>8} {'F1 susp.':>8}")
+    for name, row in results.items():
+        print(f"{name:<14} {row['artifact_mb']:>11.2f} {row['peak_fit_mb']:>11.1f} {row['fit_seconds']:>8.2f} "
+              f"{row['predict_seconds']:>9.3f} {row['accuracy']:>8.3f} {row['f1_suspicious']:>8.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""Tiered verdicts: rules, then the ML model, then the LLM only when needed.
+
+A posting whose risk score already reaches ``rule_threshold``, or whose
+URL is on the domain block list, is Suspicious with confidence 0, which
+is what the overrides in ``parse_response`` make of any LLM answer anyway. Otherwise, an ML
+probability of Legitimate at or above ``legit_threshold`` or at or below
+``suspicious_threshold`` decides the verdict. Only postings in between
+(or with no usable probability) go to the LLM. Locally decided verdicts
+get a template explanation from the matched red flags and the terms the
+model weighted most.
+
+``DecisionCascade.stats()`` reports how many analyses each tier resolved
+(``store``, ``near_duplicate``, ``rules``, ``ml``, ``llm``, ``fallback``).
+"""
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from domain_index import BLOCK
+from instrumentation import increment
+from llm_analysis import BLOCKED_DOMAIN_INDICATOR
+from orchestrator import ml_input
+
+TIERS = ("store", "near_duplicate", "rules", "ml", "llm", "fallback")
+
+
+def _format_terms(terms: List[Tuple[str, float]]) -> str:
+    return ", ".join(f'"{term}"' for term, _ in terms)
+
+
+def explain(tier: str, prediction: str, checks: Dict[str, Any], terms: List[Tuple[str, float]]) -> str:
+    """Template explanation for a verdict reached without the LLM."""
+    desc_analysis = checks["desc_analysis"]
+    flags = desc_analysis.get("red_flag_matches") or []
+    if tier == "rules" and checks.get("source_verdict") == BLOCK:
+        sentences = ["The job URL is on the blocked domain list of known scam hosts."]
+    elif tier == "rules":
+        sentences = [f"The rule checks found strong scam indicators (risk score {desc_analysis.get('risk_score', 0)})."]
+    else:
+        sentences = [f"The ML model rates this posting {checks['ml_probability']:.0%} likely to be legitimate."]
+    if flags:
+        sentences.append(f"Red flags: {', '.join(repr(flag) for flag in flags)}.")
+    if desc_analysis.get("suspicious_pattern_count"):
+        sentences.append(f"Suspicious patterns matched: {desc_analysis['suspicious_pattern_count']}.")
+    towards_legit = [item for item in terms if item[1] > 0]
+    towards_suspicious = [item for item in terms if item[1] < 0]
+    if prediction == "Suspicious" and towards_suspicious:
+        sentences.append(f"Wording that weighed most towards Suspicious: {_format_terms(towards_suspicious)}.")
+    elif prediction == "Legitimate" and towards_legit:
+        sentences.append(f"Wording that weighed most towards Legitimate: {_format_terms(towards_legit)}.")
+    if checks.get("in_verified_job_board"):
+        sentences.append("The URL is on a verified job board.")
+    elif not checks.get("validate_url"):
+        sentences.append("The job URL does not look valid.")
+    if prediction == "Suspicious":
+        sentences.append("Do not share personal or bank details or pay any fee before verifying the employer directly.")
+    return " ".join(sentences)
+
+
+class DecisionCascade:
+    def __init__(self, rule_threshold: int = 50, legit_threshold: float = 0.85,
+                 suspicious_threshold: float = 0.15, top_terms: int = 5):
+        if not 0.0 <= suspicious_threshold < legit_threshold <= 1.0:
+            raise ValueError("need 0 <= suspicious_threshold < legit_threshold <= 1")
+        self.rule_threshold = rule_threshold
+        self.legit_threshold = legit_threshold
+        self.suspicious_threshold = suspicious_threshold
+        self.top_terms = top_terms
+        self._counts = {tier: 0 for tier in TIERS}
+        self._lock = threading.Lock()
+
+    def decide(self, checker, job: Dict[str, str], checks: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Verdict from the local checks alone, or None when the posting needs the LLM.
+
+        The verdict has the ``parse_response`` fields plus ``resolved_by``
+        (``"rules"`` or ``"ml"``).
+        """
+        desc_analysis = checks["desc_analysis"]
+        probability = checks.get("ml_probability")
+        blocked = checks.get("source_verdict") == BLOCK
+        if blocked or desc_analysis.get("risk_score", 0) >= self.rule_threshold:
+            tier, prediction, confidence = "rules", "Suspicious", 0
+        elif probability is not None and probability >= self.legit_threshold:
+            tier, prediction, confidence = "ml", "Legitimate", int(round(probability * 100))
+        elif probability is not None and probability <= self.suspicious_threshold:
+            tier, prediction, confidence = "ml", "Suspicious", int(round(probability * 100))
+        else:
+            return None
+        terms = checker.top_terms(ml_input(job), self.top_terms) if self.top_terms else []
+        negative = [BLOCKED_DOMAIN_INDICATOR] if blocked else []
+        negative += desc_analysis.get("red_flag_matches") or []
+        negative += [term for term, weight in terms if weight < 0]
+        positive = ["verified_job_board"] if checks.get("in_verified_job_board") else []
+        positive += [term for term, weight in terms if weight > 0]
+        return {
+            "prediction": prediction,
+            "confidence": confidence,
+            "explanation": explain(tier, prediction, checks, terms),
+            "positive_indicators": positive,
+            "negative_indicators": negative,
+            "resolved_by": tier,
+        }
+
+    def record(self, tier: str) -> None:
+        if tier not in self._counts:
+            raise ValueError(f"unknown tier {tier!r}")
+        increment(f"cascade_{tier}")
+        with self._lock:
+            self._counts[tier] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Analyses resolved per tier, with each tier's share of the total."""
+        with self._lock:
+            counts = dict(self._counts)
+        total = sum(counts.values())
+        return {
+            "total": total,
+            "counts": counts,
+            "fractions": {tier: (count / total if total else 0.0) for tier, count in counts.items()},
+        }
+
+
+_cascade: Optional[DecisionCascade] = None
+_cascade_lock = threading.Lock()
+
+
+def get_decision_cascade() -> Optional[DecisionCascade]:
+    # Process-wide cascade; JOB_ANALYZER_CASCADE=0 sends every posting to the LLM as before
+    global _cascade
+    if os.getenv("JOB_ANALYZER_CASCADE", "1").lower() in ("0", "false", "no"):
+        return None
+    if _cascade is None:
+        with _cascade_lock:
+            if _cascade is None:
+                _cascade = DecisionCascade(
+                    rule_threshold=int(os.getenv("CASCADE_RULE_THRESHOLD", "50")),
+                    legit_threshold=float(os.getenv("CASCADE_LEGIT_THRESHOLD", "0.85")),
+                    suspicious_threshold=float(os.getenv("CASCADE_SUSPICIOUS_THRESHOLD", "0.15")),
+                )
+    return _cascade
@@ -0,0 +1,184 @@
+"""Domain reputation index for job URLs.
+
+Rules are ``host`` or ``host/path-prefix`` entries with an allow or block
+verdict. A host rule covers the host and all of its subdomains, so
+``indeed.com`` matches ``uk.indeed.com`` but not ``indeed.com.evil.io``.
+Lookups hash each suffix of the URL's host (a handful of dict probes) and
+then check that host's path prefixes, so cost does not depend on how many
+rules are loaded.
+
+Prebuilt index files are plain text, one ``<a|b> <rule>`` line per rule,
+sorted and deduplicated by ``python domain_index.py build``.
+"""
+import argparse
+import sys
+import urllib.parse
+from typing import Dict, Iterable, List, Optional, Tuple
+
+ALLOW = "allow"
+BLOCK = "block"
+UNKNOWN = "unknown"
+
+_FILE_HEADER = "# job-analyzer domain index v1"
+
+
+def normalize_host(host: str) -> str:
+    host = host.strip().lower().rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    try:
+        # Compare internationalized hosts in their ASCII form
+        host = host.encode("idna").decode("ascii")
+    except UnicodeError:
+        pass
+    return host
+
+
+def split_rule(rule: str) -> Tuple[str, str]:
+    """Split ``host[/path]`` (optionally with a scheme) into a normalized host and path prefix."""
+    rule = rule.strip()
+    if "://" not in rule:
+        rule = "//" + rule
+    parsed = urllib.parse.urlsplit(rule)
+    return normalize_host(parsed.hostname or ""), parsed.path.rstrip("/")
+
+
+class DomainIndex:
+    def __init__(self):
+        # Whole-host rules, and per-host path-prefix rules kept longest prefix first
+        self._hosts: Dict[str, str] = {}
+        self._paths: Dict[str, List[Tuple[str, str]]] = {}
+
+    def add(self, rule: str, verdict: str) -> None:
+        if verdict not in (ALLOW, BLOCK):
+            raise ValueError(f"verdict must be {ALLOW!r} or {BLOCK!r}, got {verdict!r}")
+        host, path = split_rule(rule)
+        if not host:
+            raise ValueError(f"rule has no host: {rule!r}")
+        if not path:
+            # Block wins when the same rule appears in both lists
+            if self._hosts.get(host) != BLOCK:
+                self._hosts[host] = verdict
+            return
+        entries = self._paths.setdefault(host, [])
+        for i, (existing_path, existing_verdict) in enumerate(entries):
+            if existing_path == path:
+                if existing_verdict != BLOCK:
+                    entries[i] = (path, verdict)
+                return
+        entries.append((path, verdict))
+        entries.sort(key=lambda entry: len(entry[0]), reverse=True)
+
+    def update(self, rules: Iterable[str], verdict: str) -> None:
+        for rule in rules:
+            if rule.strip() and not rule.lstrip().startswith("#"):
+                self.add(rule, verdict)
+
+    def lookup(self, url: str) -> str:
+        """Verdict for ``url``: the most specific matching host, then the longest path prefix."""
+        try:
+            parsed = urllib.parse.urlsplit(url if "://" in url else "//" + url)
+            host = normalize_host(parsed.hostname or "")
+        except ValueError:
+            return UNKNOWN
+        if not host:
+            return UNKNOWN
+        path = parsed.path
+        hosts, paths = self._hosts, self._paths
+        labels = host.split(".")
+        for i in range(len(labels)):
+            suffix = ".".join(labels[i:]) if i else host
+            entries = paths.get(suffix)
+            if entries:
+                for prefix, verdict in entries:
+                    if path == prefix or path.startswith(prefix + "/"):
+                        return verdict
+            verdict = hosts.get(suffix)
+            if verdict is not None:
+                return verdict
+        return UNKNOWN
+
+    def __len__(self) -> int:
+        return len(self._hosts) + sum(len(entries) for entries in self._paths.values())
+
+    def iter_rules(self) -> Iterable[Tuple[str, str]]:
+        yield from self._hosts.items()
+        for host, entries in self._paths.items():
+            for path, verdict in entries:
+                yield host + path, verdict
+
+    def save(self, path: str) -> None:
+        lines = sorted(f"{verdict[0]} {rule}" for rule, verdict in self.iter_rules())
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write(_FILE_HEADER + "\n")
+            handle.write("\n".join(lines))
+            handle.write("\n")
+
+    @classmethod
+    def load(cls, path: str) -> "DomainIndex":
+        index = cls()
+        hosts, paths = index._hosts, index._paths
+        with open(path, encoding="utf-8") as handle:
+            lines = handle.read().splitlines()
+        if not lines or lines[0] != _FILE_HEADER:
+            raise ValueError(f"{path} is not a domain index file (run 'python domain_index.py build')")
+        # Prebuilt files are already normalized and deduplicated, so skip add()'s checks
+        allow_code = "a "
+        for line in lines[1:]:
+            if not line.strip():
+                # An empty index is saved as the header and a blank line
+                continue
+            if "/" not in line:
+                hosts[line[2:]] = ALLOW if line.startswith(allow_code) else BLOCK
+                continue
+            code, rule = line[:2], line[2:]
+            slash = rule.index("/")
+            paths.setdefault(rule[:slash], []).append(
+                (rule[slash:], ALLOW if code == allow_code else BLOCK))
+        for entries in paths.values():
+            if len(entries) > 1:
+                entries.sort(key=lambda entry: len(entry[0]), reverse=True)
+        return index
+
+    @classmethod
+    def from_lists(cls, allow: Iterable[str] = (), block: Iterable[str] = ()) -> "DomainIndex":
+        index = cls()
+        index.update(allow, ALLOW)
+        index.update(block, BLOCK)
+        return index
+
+
+def _read_list(path: str) -> List[str]:
+    with open(path, encoding="utf-8") as handle:
+        return handle.read().splitlines()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build or query a domain reputation index.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="compile allow/block lists into an index file")
+    build.add_argument("output")
+    build.add_argument("--allow", action="append", default=[], help="file with one domain[/path] per line")
+    build.add_argument("--block", action="append", default=[], help="file with one domain[/path] per line")
+    query = commands.add_parser("query", help="look up URLs in an index file")
+    query.add_argument("index")
+    query.add_argument("urls", nargs="+")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        index = DomainIndex()
+        for path in args.allow:
+            index.update(_read_list(path), ALLOW)
+        for path in args.block:
+            index.update(_read_list(path), BLOCK)
+        index.save(args.output)
+        print(f"wrote {len(index)} rules to {args.output}")
+    else:
+        index = DomainIndex.load(args.index)
+        for url in args.urls:
+            print(f"{index.lookup(url)}\t{url}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
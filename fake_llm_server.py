@@ -0,0 +1,131 @@
+"""Local stand-in for a rate-limited LLM API, for exercising llm_scheduler.py.
+
+    python fake_llm_server.py --port 8766 --rpm 60 --latency-ms 800 --per-posting-ms 150 --error-rate 0.02
+
+``POST /generate`` with ``{"prompt": ...}`` answers ``{"text": ...}`` using
+StubLLM, after a simulated latency that grows with the number of postings
+in the prompt. More than ``--rpm`` requests in any 60 s window get a 429
+with ``Retry-After``, and ``--error-rate`` of the requests fail with a 503.
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import urllib.request
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+from llm_analysis import StubLLM
+
+
+class _Response:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeLLMClient:
+    """``generate_content`` client for the fake server; HTTP errors surface as ``urllib.error.HTTPError``."""
+
+    model_name = "fake-llm"
+
+    def __init__(self, url: str, timeout: float = 60.0):
+        self.url = url.rstrip("/") + "/generate"
+        self.timeout = timeout
+
+    def generate_content(self, prompt: str) -> _Response:
+        request = urllib.request.Request(self.url, data=json.dumps({"prompt": prompt}).encode("utf-8"),
+                                         headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return _Response(json.loads(response.read())["text"])
+
+
+class RequestWindow:
+    """Counts requests in a sliding 60 s window."""
+
+    def __init__(self, requests_per_minute: int):
+        self.requests_per_minute = requests_per_minute
+        self._times: deque = deque()
+        self._lock = threading.Lock()
+
+    def admit(self) -> Optional[float]:
+        # None when admitted, else seconds until a slot frees up
+        now = time.monotonic()
+        with self._lock:
+            while self._times and now - self._times[0] >= 60.0:
+                self._times.popleft()
+            if len(self._times) >= self.requests_per_minute:
+                return 60.0 - (now - self._times[0])
+            self._times.append(now)
+            return None
+
+
+def make_handler(window: RequestWindow, latency: float, per_posting: float, error_rate: float):
+    stub = StubLLM()
+
+    class FakeLLMHandler(BaseHTTPRequestHandler):
+        def _reply(self, status: int, payload: dict, headers: Optional[dict] = None) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            if self.path != "/generate":
+                self.send_error(404)
+                return
+            prompt = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))["prompt"]
+            wait = window.admit()
+            if wait is not None:
+                self._reply(429, {"error": "rate limit exceeded"}, {"Retry-After": f"{wait:.2f}"})
+                return
+            if random.random() < error_rate:
+                self._reply(503, {"error": "temporarily unavailable"})
+                return
+            time.sleep(latency + per_posting * max(1, prompt.count("Posting ID:")))
+            self._reply(200, {"text": stub.generate_content(prompt).text})
+
+        def log_message(self, format, *args):
+            pass
+
+    return FakeLLMHandler
+
+
+def serve(host: str = "127.0.0.1", port: int = 8766, requests_per_minute: int = 60, latency_ms: float = 800,
+          per_posting_ms: float = 150, error_rate: float = 0.0) -> ThreadingHTTPServer:
+    """Start the fake server in a daemon thread and return it (call ``shutdown()`` to stop)."""
+    handler = make_handler(RequestWindow(requests_per_minute), latency_ms / 1000.0, per_posting_ms / 1000.0,
+                           error_rate)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-llm-server", daemon=True).start()
+    return server
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve a fake rate-limited LLM endpoint.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--rpm", type=int, default=60, help="requests admitted per 60 s window")
+    parser.add_argument("--latency-ms", type=float, default=800, help="base latency per request")
+    parser.add_argument("--per-posting-ms", type=float, default=150, help="extra latency per posting in a prompt")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests failing with 503")
+    args = parser.parse_args(argv)
+    server = serve(args.host, args.port, args.rpm, args.latency_ms, args.per_posting_ms, args.error_rate)
+    print(f"fake LLM listening on http://{args.host}:{args.port}/generate")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
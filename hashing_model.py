@@ -0,0 +1,115 @@
+"""Vocabulary-free featurization with incrementally trained models.
+
+``HashingVectorizer`` maps tokens to a fixed number of columns with a hash,
+so nothing grows with the vocabulary and there is nothing to fit. Paired
+with an ``SGDClassifier`` (logistic loss) it can learn from newly labelled
+postings in mini-batches with ``partial_fit`` instead of a full offline
+retrain.
+"""
+import copy
+import os
+import pickle
+import threading
+from itertools import islice
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+
+# 2**20 columns keeps collisions rare for job-posting vocabularies
+DEFAULT_N_FEATURES = 2 ** 20
+# Separate from model.pkl, which is fitted on the TF-IDF feature space
+DEFAULT_MODEL_PATH = "model_hashing.pkl"
+# 0 = Suspicious, 1 = Legitimate, matching preprocess_and_predict
+CLASSES = np.array([0, 1])
+
+
+def make_hashing_vectorizer(n_features: int = DEFAULT_N_FEATURES) -> HashingVectorizer:
+    # Texts are already lowercased and stopword-filtered by preprocess_text
+    return HashingVectorizer(n_features=n_features, alternate_sign=False, norm="l2")
+
+
+def make_incremental_model(random_state: int = 0) -> SGDClassifier:
+    return SGDClassifier(loss="log_loss", alpha=1e-5, random_state=random_state)
+
+
+def is_fitted(model) -> bool:
+    return hasattr(model, "classes_")
+
+
+class IncrementalTrainer:
+    """Streams labelled postings into a checker running in ``featurizer="hashing"`` mode.
+
+    Each ``update`` trains a copy of the live model and then swaps it in
+    with a single attribute assignment, so concurrent predictions see either
+    the old or the new version, never a half-updated one.
+    """
+
+    def __init__(self, checker, batch_size: int = 256):
+        if not isinstance(checker.tfidf_vectorizer, HashingVectorizer):
+            raise ValueError("IncrementalTrainer needs a checker created with featurizer='hashing'")
+        self.checker = checker
+        self.batch_size = batch_size
+        self.version = 0
+        self._lock = threading.Lock()
+
+    def update(self, postings: Iterable[Dict[str, str]], labels: Iterable[int]) -> int:
+        """Train on ``(posting, label)`` pairs in mini-batches and swap the model; returns the new version."""
+        with self._lock:
+            candidate = copy.deepcopy(self.checker.model)
+            pairs = zip(postings, labels)
+            while True:
+                batch = list(islice(pairs, self.batch_size))
+                if not batch:
+                    break
+                texts = [self.checker.combine_text(posting) for posting, _ in batch]
+                features = self.checker.tfidf_vectorizer.transform(texts)
+                candidate.partial_fit(features, np.array([label for _, label in batch]), classes=CLASSES)
+            self.checker.model = candidate
+            self.version += 1
+            return self.version
+
+    def save(self, model_path: str) -> None:
+        # Write-then-rename so a reader never loads a partially written pickle
+        tmp_path = model_path + ".tmp"
+        with open(tmp_path, "wb") as model_file:
+            pickle.dump(self.checker.model, model_file)
+        os.replace(tmp_path, model_path)
+
+
+def pickled_size(obj) -> int:
+    return len(pickle.dumps(obj))
+
+
+def evaluate(predictions: Sequence[int], labels: Sequence[int]) -> Tuple[float, float]:
+    """Accuracy and F1 for the Suspicious (0) class."""
+    predictions, labels = np.asarray(predictions), np.asarray(labels)
+    accuracy = float(np.mean(predictions == labels)) if len(labels) else 0.0
+    true_positive = np.sum((predictions == 0) & (labels == 0))
+    predicted = np.sum(predictions == 0)
+    actual = np.sum(labels == 0)
+    precision = true_positive / predicted if predicted else 0.0
+    recall = true_positive / actual if actual else 0.0
+    f1 = float(2 * precision * recall / (precision + recall)) if precision + recall else 0.0
+    return accuracy, f1
+
+
+def load_model(model_path: Optional[str], n_features: int = DEFAULT_N_FEATURES):
+    """The model pickled at ``model_path``, or a new unfitted one when there is no file.
+
+    Raises ValueError when the pickle cannot be trained incrementally or was
+    fitted on a different number of features (e.g. the TF-IDF ``model.pkl``).
+    """
+    if not (model_path and os.path.exists(model_path)):
+        return make_incremental_model()
+    with open(model_path, "rb") as model_file:
+        model = pickle.load(model_file)
+    if not hasattr(model, "partial_fit"):
+        raise ValueError(f"{model_path} holds a {type(model).__name__}, which has no partial_fit; "
+                         f"hashing mode needs an incrementally trainable model such as SGDClassifier")
+    fitted_features = getattr(model, "n_features_in_", None)
+    if fitted_features is not None and fitted_features != n_features:
+        raise ValueError(f"{model_path} was fitted on {fitted_features} features, but the hashing "
+                         f"vectorizer produces {n_features}; is it a TF-IDF model?")
+    return model
@@ -0,0 +1,90 @@
+"""Import-time budget for the modules every app process, worker and test run loads.
+
+    python import_budget.py
+    python import_budget.py --runs 5 --scale 2
+
+Each module is imported in a fresh interpreter under ``python -X importtime``.
+The median cumulative time of its top-level import over ``--runs`` is
+compared with its budget in ``IMPORT_BUDGET_MS``; ``--scale`` loosens every
+budget on slow machines. Independently of machine speed, none of them may
+import a module in ``HEAVY_MODULES``: those belong behind a first use.
+Exits with status 1 on any violation.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+# Milliseconds, with headroom over a cold import on a laptop (~50 ms for joblegitchecker2)
+IMPORT_BUDGET_MS = {
+    "joblegitchecker2": 250,
+    "model_registry": 250,
+    "orchestrator": 250,
+    "decision_cascade": 250,
+    "llm_analysis": 150,
+    "llm_cache": 150,
+    "near_duplicates": 150,
+    "result_store": 150,
+    "text_preprocessing": 50,
+}
+HEAVY_MODULES = ("sklearn", "scipy", "numpy", "nltk", "pandas", "google.generativeai")
+
+
+def import_profile(module: str) -> Tuple[float, List[str]]:
+    """Cumulative import time of ``module`` in milliseconds, and every module it imported."""
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                               capture_output=True, text=True, check=True)
+    cumulative, imported = 0.0, []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, total, name = line.split("|", 2)
+        if not total.strip().isdigit():
+            # Header line
+            continue
+        name = name.strip()
+        imported.append(name)
+        if name == module:
+            cumulative = int(total) / 1000.0
+    return cumulative, imported
+
+
+def heavy_imports(imported: List[str]) -> List[str]:
+    # The heavy packages themselves, not each of their submodules
+    return [heavy for heavy in HEAVY_MODULES
+            if any(name == heavy or name.startswith(heavy + ".") for name in imported)]
+
+
+def check(budgets: Dict[str, float], runs: int = 3, scale: float = 1.0) -> List[str]:
+    """Violations of ``budgets`` as readable lines; empty when everything is within budget."""
+    violations = []
+    for module, budget in budgets.items():
+        profiles = [import_profile(module) for _ in range(runs)]
+        median = statistics.median(milliseconds for milliseconds, _ in profiles)
+        heavy = heavy_imports(profiles[0][1])
+        allowed = budget * scale
+        status = "ok" if median <= allowed and not heavy else "FAIL"
+        print(f"{status:<4} {module:<20} {median:8.1f} ms  (budget {allowed:.0f} ms)")
+        if median > allowed:
+            violations.append(f"{module}: {median:.1f} ms > {allowed:.0f} ms")
+        if heavy:
+            violations.append(f"{module} imports {', '.join(heavy)} at import time")
+    return violations
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Fail when importing the core modules gets slow.")
+    parser.add_argument("--runs", type=int, default=3, help="imports per module; the median is used")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget, for slow machines")
+    parser.add_argument("modules", nargs="*", help="modules to check (default: all budgeted modules)")
+    args = parser.parse_args(argv)
+    budgets = {module: IMPORT_BUDGET_MS[module] for module in args.modules} if args.modules else IMPORT_BUDGET_MS
+    violations = check(budgets, runs=args.runs, scale=args.scale)
+    for violation in violations:
+        print(violation, file=sys.stderr)
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
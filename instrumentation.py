@@ -0,0 +1,276 @@
+"""Per-stage timing, counters and input-size stats for the analysis pipeline.
+
+Disabled by default; set ``JOB_ANALYZER_METRICS=1`` (or call ``enable()``)
+to record. While disabled every hook returns after a single flag check.
+Metrics are exported in the Prometheus text format via ``render_prometheus``,
+``write_prometheus`` or ``start_metrics_server``. With
+``JOB_ANALYZER_TRACE_LOG=<path>`` each traced request also appends one JSON
+line with its stage timings.
+"""
+import bisect
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+# Seconds; covers regex checks (~10us) up to slow LLM calls
+LATENCY_BUCKETS = (0.00001, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0)
+# Characters or tokens
+SIZE_BUCKETS = (100, 500, 1000, 5000, 10000, 50000, 100000, 500000, 1000000, 10000000)
+
+_PREFIX = "job_analyzer"
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stage_seconds: Dict[str, Histogram] = {}
+        self.input_sizes: Dict[str, Histogram] = {}
+        self.counters: Dict[str, int] = {}
+
+    def observe_stage(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self.stage_seconds.get(stage)
+            if histogram is None:
+                histogram = self.stage_seconds[stage] = Histogram(LATENCY_BUCKETS)
+            histogram.observe(seconds)
+
+    def observe_size(self, name: str, size: int) -> None:
+        with self._lock:
+            histogram = self.input_sizes.get(name)
+            if histogram is None:
+                histogram = self.input_sizes[name] = Histogram(SIZE_BUCKETS)
+            histogram.observe(size)
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stage_seconds.clear()
+            self.input_sizes.clear()
+            self.counters.clear()
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            if self.stage_seconds:
+                _render_histograms(lines, f"{_PREFIX}_stage_seconds", "stage", self.stage_seconds,
+                                   "Time spent in each analysis stage.")
+            if self.input_sizes:
+                _render_histograms(lines, f"{_PREFIX}_input_size", "input", self.input_sizes,
+                                   "Size of analysed inputs in characters.")
+            for name, value in sorted(self.counters.items()):
+                metric = f"{_PREFIX}_{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _render_histograms(lines: List[str], metric: str, label: str, histograms: Dict[str, Histogram],
+                       help_text: str) -> None:
+    lines.append(f"# HELP {metric} {help_text}")
+    lines.append(f"# TYPE {metric} histogram")
+    for key, histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            lines.append(f'{metric}_bucket{{{label}="{key}",le="{bound:g}"}} {cumulative}')
+        lines.append(f'{metric}_bucket{{{label}="{key}",le="+Inf"}} {histogram.count}')
+        lines.append(f'{metric}_sum{{{label}="{key}"}} {histogram.total:.6f}')
+        lines.append(f'{metric}_count{{{label}="{key}"}} {histogram.count}')
+
+
+REGISTRY = MetricsRegistry()
+
+
+class _State:
+    enabled = os.getenv("JOB_ANALYZER_METRICS", "").lower() in ("1", "true", "yes")
+    trace_log_path: Optional[str] = os.getenv("JOB_ANALYZER_TRACE_LOG") or None
+
+
+_state = _State()
+_trace_lock = threading.Lock()
+_current_trace: "contextvars.ContextVar[Optional[Dict[str, Any]]]" = contextvars.ContextVar(
+    "job_analyzer_trace", default=None)
+
+
+def enable(trace_log_path: Optional[str] = None) -> None:
+    _state.enabled = True
+    if trace_log_path is not None:
+        _state.trace_log_path = trace_log_path
+
+
+def disable() -> None:
+    _state.enabled = False
+
+
+def is_enabled() -> bool:
+    return _state.enabled
+
+
+def _record_stage(name: str, seconds: float) -> None:
+    REGISTRY.observe_stage(name, seconds)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace["stages"].append({"stage": name, "seconds": round(seconds, 6)})
+
+
+def timed(name: str) -> Callable[[Callable], Callable]:
+    """Decorator recording the wrapped function's duration as stage ``name``."""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _state.enabled:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _record_stage(name, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        _record_stage(self.name, time.perf_counter() - self.started)
+        return False
+
+
+def stage(name: str):
+    """Context manager timing a block as stage ``name``."""
+    return _Stage(name) if _state.enabled else _NULL_STAGE
+
+
+def increment(name: str, amount: int = 1) -> None:
+    if _state.enabled:
+        REGISTRY.increment(name, amount)
+
+
+def observe_size(name: str, size: int) -> None:
+    if _state.enabled:
+        REGISTRY.observe_size(name, size)
+
+
+def bind_trace(func: Callable) -> Callable:
+    # Carry the current trace into a worker thread (ThreadPoolExecutor does not copy context)
+    if not _state.enabled:
+        return func
+    return functools.partial(contextvars.copy_context().run, func)
+
+
+@contextmanager
+def trace_request(**fields: Any) -> Iterator[Optional[Dict[str, Any]]]:
+    """Collect the stage timings of one request and append them to the trace log."""
+    if not _state.enabled:
+        yield None
+        return
+    trace = {"trace_id": uuid.uuid4().hex, "started": time.time(), "stages": [], **fields}
+    token = _current_trace.set(trace)
+    started = time.perf_counter()
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        trace["seconds"] = round(time.perf_counter() - started, 6)
+        REGISTRY.observe_stage("request", trace["seconds"])
+        if _state.trace_log_path:
+            line = json.dumps(trace, default=str)
+            with _trace_lock, open(_state.trace_log_path, "a", encoding="utf-8") as handle:
+                handle.write(line + "\n")
+
+
+def render_prometheus() -> str:
+    return REGISTRY.render_prometheus()
+
+
+def write_prometheus(path: str) -> None:
+    # Atomic replace, so a node_exporter textfile collector never reads a partial file
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        handle.write(render_prometheus())
+    os.replace(tmp_path, path)
+
+
+def start_metrics_server(port: int = 9105, host: str = "127.0.0.1") -> "ThreadingHTTPServer":
+    """Serve ``/metrics`` in a daemon thread."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+_server: Optional["ThreadingHTTPServer"] = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server_from_env() -> Optional["ThreadingHTTPServer"]:
+    # Once per process (safe to call on every Streamlit rerun); JOB_ANALYZER_METRICS_PORT enables it
+    global _server
+    port = os.getenv("JOB_ANALYZER_METRICS_PORT")
+    if not port or not _state.enabled:
+        return None
+    with _server_lock:
+        if _server is None:
+            _server = start_metrics_server(int(port))
+    return _server
@@ -1,12 +1,36 @@
-import re
+import hashlib
+import logging
 import pickle
-from typing import List, Dict
+from itertools import islice
+from typing import TYPE_CHECKING, List, Dict, Iterable, Optional, Tuple
+import os
 import urllib.parse
-from sklearn.feature_extraction.text import TfidfVectorizer
-import nltk
-nltk.download('stopwords', quiet=True)
-from nltk.corpus import stopwords
-import numpy as np
+from rule_engine import RuleEngine, get_rule_engine, rules_version
+from text_preprocessing import preprocess_text
+from domain_index import ALLOW, DomainIndex
+from instrumentation import increment, observe_size, stage, timed
+from large_input import LARGE_INPUT_CHARS, iter_pieces, scan_stream
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# numpy and scikit-learn are imported on first use (unpickling the model imports
+# scikit-learn anyway), so importing this module stays cheap; see import_budget.py
+
+logger = logging.getLogger(__name__)
+
+
+def file_hash(path: str) -> Optional[str]:
+    # sha256 of the file's contents, None when it cannot be read
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as artifact:
+            for block in iter(lambda: artifact.read(1 << 20), b""):
+                digest.update(block)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
 
 class JobLegitimacyChecker:
     RED_FLAGS = [
@@ -35,18 +59,63 @@ class JobLegitimacyChecker:
         'hired.com', 'angel.co', 'simplyhired.com'
     ]
 
-    def __init__(self, tfidf_path="tfidf_vectorizer.pkl", model_path="model.pkl"):
+    def __init__(self, tfidf_path="tfidf_vectorizer.pkl", model_path=None, domain_index_path=None,
+                 featurizer="tfidf", compiled_scorer_path=None):
+        # Optional prebuilt allow/block list (see domain_index.py); the verified boards are always allowed
+        domain_index_path = domain_index_path or os.getenv("JOB_ANALYZER_DOMAIN_INDEX")
+        if domain_index_path:
+            self.domain_index = DomainIndex.load(domain_index_path)
+            self.domain_index.update(self.VERIFIED_JOB_BOARDS, ALLOW)
+        else:
+            self.domain_index = DomainIndex.from_lists(allow=self.VERIFIED_JOB_BOARDS)
+        self.featurizer = featurizer
+        self.compiled_scorer = None
+        if featurizer == "hashing":
+            # Stateless features; the model is trained with partial_fit (see hashing_model.py)
+            from hashing_model import DEFAULT_MODEL_PATH, is_fitted, load_model, make_hashing_vectorizer
+            model_path = model_path or DEFAULT_MODEL_PATH
+            self.tfidf_vectorizer = make_hashing_vectorizer()
+            self.model = load_model(model_path, self.tfidf_vectorizer.n_features)
+            if not is_fitted(self.model):
+                logger.warning("No trained model at %s; ML predictions fall back to Suspicious until "
+                               "labelled postings are streamed in", model_path)
+            self._record_artifacts([model_path])
+            return
+        if featurizer != "tfidf":
+            raise ValueError(f"featurizer must be 'tfidf' or 'hashing', got {featurizer!r}")
+        model_path = model_path or "model.pkl"
+        # Exported by linear_scorer.py; replaces both pickles, which are then not loaded
+        compiled_scorer_path = compiled_scorer_path or os.getenv("JOB_ANALYZER_COMPILED_SCORER")
+        if compiled_scorer_path:
+            from linear_scorer import ARTIFACT_FILES, CompiledScorer
+            self.compiled_scorer = CompiledScorer(compiled_scorer_path)
+            self.tfidf_vectorizer = self.model = None
+            self._record_artifacts([os.path.join(compiled_scorer_path, name) for name in ARTIFACT_FILES])
+            return
         try:
             with open(tfidf_path, "rb") as vec_file:
                 self.tfidf_vectorizer = pickle.load(vec_file)
             with open(model_path, "rb") as model_file:
                 self.model = pickle.load(model_file)
-        except FileNotFoundError:
+            self._record_artifacts([tfidf_path, model_path])
+        except FileNotFoundError as missing:
             # Fallback: Create a new vectorizer and train a dummy model if files not found
+            logger.warning("Model artifact not found (%s); ML predictions fall back to Suspicious", missing.filename)
+            from sklearn.feature_extraction.text import TfidfVectorizer
             self.tfidf_vectorizer = TfidfVectorizer(stop_words='english')
             from sklearn.linear_model import LogisticRegression
             self.model = LogisticRegression()
+            self._record_artifacts(None)
+
+    def _record_artifacts(self, paths: Optional[List[str]]) -> None:
+        # Hashed at load time, so a file replaced later does not change the version of this instance
+        parts = (["unfitted"] if paths is None
+                 else [f"{os.path.basename(path)}:{file_hash(path) or 'missing'}" for path in paths])
+        self._loaded_model = self.model
+        self._artifact_version = hashlib.sha256("|".join(parts).encode()).hexdigest()[:16]
+        self._swapped_version: Optional[Tuple[object, str]] = None
 
+    @timed("validate_url")
     def validate_url(self, url: str) -> bool:
         try:
             result = urllib.parse.urlparse(url)
@@ -58,8 +127,36 @@ class JobLegitimacyChecker:
         except Exception:
             return False
 
+    @classmethod
+    def rule_engine(cls) -> RuleEngine:
+        # Compiled once per class; subclasses overriding the rule lists get their own engine
+        return get_rule_engine(tuple(cls.RED_FLAGS), tuple(cls.SUSPICIOUS_PATTERNS))
+
+    @classmethod
+    def rules_version(cls) -> str:
+        # Identifies RED_FLAGS/SUSPICIOUS_PATTERNS, e.g. to invalidate stored results when they change
+        return rules_version(tuple(cls.RED_FLAGS), tuple(cls.SUSPICIOUS_PATTERNS))
+
+    def model_version(self) -> str:
+        """Identifies the loaded model artifacts, e.g. to invalidate stored results when they change.
+
+        A hash of the files this checker loaded: both pickles, the compiled
+        scorer's arrays and ``meta.json``, or the hashing model. A model
+        swapped in later (see ``hashing_model.IncrementalTrainer``) is hashed
+        from memory instead.
+        """
+        model = self.model
+        if model is self._loaded_model:
+            return self._artifact_version
+        swapped = self._swapped_version
+        if swapped is None or swapped[0] is not model:
+            swapped = (model, hashlib.sha256(pickle.dumps(model)).hexdigest()[:16])
+            self._swapped_version = swapped
+        return swapped[1]
+
+    @timed("analyze_job_description")
     def analyze_job_description(self, description: str) -> dict:
-        description_lower = description.lower()
+        observe_size("description_chars", len(description))
         analysis = {
             "red_flag_count": 0, 
             "red_flag_matches": [],
@@ -68,21 +165,26 @@ class JobLegitimacyChecker:
             "risk_score": 0
         }
         
-        # Check for red flags (whole word matching for accuracy)
-        red_flag_matches = []
-        for flag in self.RED_FLAGS:
-            if re.search(r'\b' + re.escape(flag) + r'\b', description_lower):
-                red_flag_matches.append(flag)
+        engine = self.rule_engine()
+        
+        if len(description) > LARGE_INPUT_CHARS:
+            # Scanned in overlapping windows, up to MAX_SCAN_CHARS (see large_input.py)
+            increment("large_descriptions")
+            scan = scan_stream(engine, iter_pieces(description))
+            red_flag_matches = scan["red_flag_matches"]
+            pattern_count, suspicious_severity = scan["suspicious_pattern_count"], scan["suspicious_pattern_severity"]
+            analysis["description_chars"] = len(description)
+            analysis["scanned_chars"] = scan["scanned_chars"]
+            analysis["truncated"] = scan["truncated"]
+        else:
+            description_lower = description.lower()
+            # Check for red flags (whole word matching for accuracy, single pass over the text)
+            red_flag_matches = engine.match_red_flags(description_lower)
+            # Check for suspicious patterns with severity scoring
+            pattern_count, suspicious_severity = engine.match_patterns(description_lower)
         analysis["red_flag_count"] = len(red_flag_matches)
         analysis["red_flag_matches"] = red_flag_matches
         
-        # Check for suspicious patterns with severity scoring
-        suspicious_severity = 0
-        pattern_count = 0
-        for pattern, severity in self.SUSPICIOUS_PATTERNS:
-            if re.search(pattern, description_lower):
-                pattern_count += 1
-                suspicious_severity += severity
         analysis["suspicious_pattern_count"] = pattern_count
         analysis["suspicious_pattern_severity"] = suspicious_severity
         
@@ -92,35 +194,146 @@ class JobLegitimacyChecker:
         
         return analysis
 
+    def source_verdict(self, job_url: str) -> str:
+        # "allow", "block" or "unknown" by host-suffix and path-prefix match
+        return self.domain_index.lookup(job_url)
+
+    @timed("verify_job_source")
     def verify_job_source(self, job_url: str) -> bool:
-        try:
-            parsed_url = urllib.parse.urlparse(job_url)
-            domain = parsed_url.netloc.lower().replace('www.', '')
-            return any(board in domain for board in self.VERIFIED_JOB_BOARDS)
-        except Exception:
-            return False
+        return self.source_verdict(job_url) == ALLOW
 
-    def preprocess_and_predict(self, data: Dict[str, str]) -> int:
-        def preprocess_text(text: str) -> str:
-            if not text:
-                return ""
-            text = text.lower()
-            text = re.sub(r'\d+', '', text)
-            text = re.sub(r'\s+', ' ', text)
-            text = re.sub(r'[^\w\s]', '', text)
-            text = [word for word in text.split() if word not in stopwords.words('english')]
-            return ' '.join(text)
-
-        # Preprocess and combine text
+    def combine_text(self, data: Dict[str, str]) -> str:
+        # Preprocess and combine text (the input the ML model sees)
         preprocessed_data = {key: preprocess_text(value) for key, value in data.items()}
-        combined_text = ' '.join(preprocessed_data.values())
+        return ' '.join(preprocessed_data.values())
+
+    @timed("preprocess_and_predict")
+    def preprocess_and_predict(self, data: Dict[str, str]) -> int:
+        with stage("preprocess"):
+            combined_text = self.combine_text(data)
+        observe_size("combined_text_chars", len(combined_text))
         
         # Predict using the ML model
         try:
-            tfidf_features = self.tfidf_vectorizer.transform([combined_text])
-            prediction = self.model.predict(tfidf_features)
+            with stage("model_inference"):
+                if self.compiled_scorer is not None:
+                    return self.compiled_scorer.predict(combined_text)
+                tfidf_features = self.tfidf_vectorizer.transform([combined_text])
+                prediction = self.model.predict(tfidf_features)
             return prediction[0]
         except Exception:
             # Fallback prediction if model fails
+            increment("model_fallbacks")
             return 0  # Suspicious
-        
+
+    @timed("predict_with_proba")
+    def predict_with_proba(self, data: Dict[str, str]) -> Tuple[int, Optional[float]]:
+        """Prediction plus the model's probability of Legitimate (None when the model has no probabilities)."""
+        with stage("preprocess"):
+            combined_text = self.combine_text(data)
+        observe_size("combined_text_chars", len(combined_text))
+        try:
+            with stage("model_inference"):
+                if self.compiled_scorer is not None:
+                    predictions, probabilities = self.compiled_scorer.predict_many([combined_text])
+                    probability = float(probabilities[0]) if self.compiled_scorer.meta["logistic_proba"] else None
+                    return int(predictions[0]), probability
+                tfidf_features = self.tfidf_vectorizer.transform([combined_text])
+                prediction = int(self.model.predict(tfidf_features)[0])
+        except Exception:
+            increment("model_fallbacks")
+            return 0, None
+        try:
+            return prediction, float(self._legitimate_proba(tfidf_features)[0])
+        except Exception:
+            return prediction, None
+
+    def top_terms(self, data: Dict[str, str], count: int = 5) -> List[Tuple[str, float]]:
+        """Terms of the posting with the largest weight in a linear model's decision.
+
+        Weights are signed: positive pushes towards Legitimate, negative towards
+        Suspicious. Empty for non-linear models and hashed features.
+        """
+        combined_text = self.combine_text(data)
+        try:
+            if self.compiled_scorer is not None:
+                contributions = self.compiled_scorer.term_contributions(combined_text)
+                if self.compiled_scorer.classes[1] != 1:
+                    contributions = [(term, -weight) for term, weight in contributions]
+            else:
+                coef = getattr(self.model, "coef_", None)
+                if coef is None or not hasattr(self.tfidf_vectorizer, "get_feature_names_out"):
+                    return []
+                features = self.tfidf_vectorizer.transform([combined_text]).tocoo()
+                sign = 1.0 if list(self.model.classes_).index(1) == 1 else -1.0
+                names = self._feature_names()
+                contributions = [(names[column], sign * float(value * coef[0][column]))
+                                 for column, value in zip(features.col, features.data)]
+        except Exception:
+            return []
+        contributions.sort(key=lambda item: abs(item[1]), reverse=True)
+        return contributions[:count]
+
+    def _feature_names(self) -> "np.ndarray":
+        # get_feature_names_out rebuilds the array on every call
+        names = getattr(self, "_feature_names_cache", None)
+        if names is None:
+            names = self._feature_names_cache = self.tfidf_vectorizer.get_feature_names_out()
+        return names
+
+    def _legitimate_proba(self, tfidf_features) -> "np.ndarray":
+        import numpy as np
+        # Probability of the "Legitimate" (1) class, 0.0 when the model has no such class
+        proba = self.model.predict_proba(tfidf_features)
+        classes = list(getattr(self.model, "classes_", []))
+        if 1 not in classes:
+            return np.zeros(proba.shape[0])
+        return proba[:, classes.index(1)]
+
+    @timed("predict_many")
+    def predict_many(self, postings: Iterable[Dict[str, str]],
+                     batch_size: int = 1024) -> Tuple["np.ndarray", "np.ndarray"]:
+        """Score many postings with one transform/predict call per batch.
+
+        Returns ``(predictions, legitimate_probabilities)`` in input order. A batch
+        the model cannot score falls back to 0 (Suspicious) like the single-item path,
+        with a NaN probability where ``predict_with_proba`` gives None.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        import numpy as np
+        predictions, probabilities = [], []
+        postings = iter(postings)
+        while True:
+            batch = list(islice(postings, batch_size))
+            if not batch:
+                break
+            with stage("preprocess_batch"):
+                texts = [self.combine_text(data) for data in batch]
+            if self.compiled_scorer is not None:
+                with stage("model_inference_batch"):
+                    batch_predictions, batch_probabilities = self.compiled_scorer.predict_many(texts)
+                predictions.append(batch_predictions)
+                probabilities.append(batch_probabilities)
+                continue
+            try:
+                with stage("model_inference_batch"):
+                    tfidf_features = self.tfidf_vectorizer.transform(texts)
+                    batch_predictions = np.asarray(self.model.predict(tfidf_features))
+            except Exception:
+                increment("model_fallbacks", len(batch))
+                predictions.append(np.zeros(len(batch), dtype=int))
+                probabilities.append(np.full(len(batch), np.nan))
+                continue
+            predictions.append(batch_predictions)
+            try:
+                probabilities.append(self._legitimate_proba(tfidf_features))
+            except Exception:
+                # Models without predict_proba: use the hard prediction as the score
+                probabilities.append((batch_predictions == 1).astype(float))
+        if not predictions:
+            return np.zeros(0, dtype=int), np.zeros(0)
+        return np.concatenate(predictions), np.concatenate(probabilities)
+
+    def analyze_many(self, descriptions: Iterable[str]) -> List[dict]:
+        return [self.analyze_job_description(description) for description in descriptions]
@@ -0,0 +1,206 @@
+"""Bounded-cost handling of very large postings.
+
+    python large_input.py --sizes 100000 1000000 10000000
+
+Descriptions longer than ``LARGE_INPUT_CHARS`` are neither lowercased nor
+scanned in one piece. ``scan_stream`` runs the rule engine over
+overlapping windows of about ``WINDOW_CHARS``. A window only reports
+matches that start in its own stretch of the text, and the overlap gives
+each of them the whole phrase plus the characters on either side, so red
+flags and pattern pieces straddling a window edge match exactly as in a
+single pass. ``a.*b.*c`` patterns carry the pieces found so far from one
+window to the next; patterns the rule engine could not split only match
+within one window. At most ``MAX_SCAN_CHARS`` are scanned per posting and
+the analysis records when the rest was skipped. Extra memory is about one
+window, whatever the input size.
+
+``bound_fields`` caps the text the ML model and the near-duplicate index
+see at ``MAX_MODEL_CHARS`` in total, shared fairly between the fields.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from itertools import chain
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from rule_engine import RuleEngine
+
+# Descriptions above this size are scanned in windows
+LARGE_INPUT_CHARS = int(os.getenv("JOB_ANALYZER_LARGE_INPUT_CHARS", "100000"))
+# Characters of a description the rules look at; the rest is skipped
+MAX_SCAN_CHARS = int(os.getenv("JOB_ANALYZER_MAX_SCAN_CHARS", "1000000"))
+# Characters of posting text (all fields together) the ML model sees
+MAX_MODEL_CHARS = int(os.getenv("JOB_ANALYZER_MAX_MODEL_CHARS", "200000"))
+WINDOW_CHARS = 65536
+# Matches shorter than this are always seen whole in some window
+OVERLAP_CHARS = 512
+
+
+def iter_pieces(text: str, size: int = WINDOW_CHARS) -> Iterator[str]:
+    for start in range(0, len(text), size):
+        yield text[start:start + size]
+
+
+class _PatternState:
+    __slots__ = ("pieces", "severity", "next_piece", "cursor")
+
+    def __init__(self, pieces: List[Any], severity: int):
+        self.pieces = pieces
+        self.severity = severity
+        # Pieces found so far on the current line, and where the next one may start
+        self.next_piece = 0
+        self.cursor = 0
+
+
+class _StreamScan:
+    def __init__(self, engine: RuleEngine, overlap: int):
+        self.engine = engine
+        longest_flag = max((len(flag) for flag in engine.red_flags), default=0)
+        self.overlap = max(overlap, longest_flag + 1)
+        self.flags = set()
+        self.pending = [_PatternState(pattern.pieces, severity) for pattern, severity in engine.patterns]
+        self.matched: List[_PatternState] = []
+
+    def window(self, text: str, offset: int, start: int, stop: int) -> None:
+        # Report matches starting in text[start:stop]; text[0] is at ``offset`` in the whole input
+        self.flags.update(self.engine.phrase_matcher.find_all(text, start, stop))
+        still_pending = []
+        for state in self.pending:
+            if self._advance(state, text, offset, start, stop):
+                self.matched.append(state)
+            else:
+                still_pending.append(state)
+        self.pending = still_pending
+
+    @staticmethod
+    def _advance(state: _PatternState, text: str, offset: int, start: int, stop: int) -> bool:
+        # LinearPattern.search, resumable: earliest match of each piece, later pieces on the same line
+        position = max(state.cursor - offset, start)
+        pieces = state.pieces
+        while True:
+            if state.next_piece == 0:
+                match = pieces[0].search(text, position)
+                if match is None or match.start() >= stop:
+                    position = max(position, stop)
+                    break
+            else:
+                line_end = text.find('\n', position)
+                match = pieces[state.next_piece].search(text, position,
+                                                        len(text) if line_end == -1 else line_end)
+                if match is None or match.start() >= stop:
+                    if line_end != -1 and line_end < stop:
+                        # This line is done: start over on the next one
+                        state.next_piece = 0
+                        position = line_end + 1
+                        continue
+                    break
+            state.next_piece += 1
+            position = match.end()
+            if state.next_piece == len(pieces):
+                return True
+        state.cursor = offset + position
+        return False
+
+    def result(self, scanned: int, truncated: bool) -> Dict[str, Any]:
+        return {
+            "red_flag_matches": [self.engine.red_flags[index] for index in sorted(self.flags)],
+            "suspicious_pattern_count": len(self.matched),
+            "suspicious_pattern_severity": sum(state.severity for state in self.matched),
+            "scanned_chars": scanned,
+            "truncated": truncated,
+        }
+
+
+def scan_stream(engine: RuleEngine, pieces: Iterable[str], limit: int = MAX_SCAN_CHARS,
+                window_chars: int = WINDOW_CHARS, overlap: int = OVERLAP_CHARS) -> Dict[str, Any]:
+    """Rule matches over text arriving in ``pieces`` (not yet lowercased), one window at a time.
+
+    Gives the same red flags and pattern counts as ``RuleEngine`` on the
+    joined, lowercased text, for up to ``limit`` characters. Returns
+    ``red_flag_matches``, ``suspicious_pattern_count``,
+    ``suspicious_pattern_severity``, ``scanned_chars`` and ``truncated``.
+    """
+    scan = _StreamScan(engine, overlap)
+    pieces = iter(chain.from_iterable(iter_pieces(piece, window_chars) for piece in pieces))
+    carry, offset, start = "", 0, 0
+    scanned, truncated = 0, False
+    upcoming = next(pieces, None)
+    while upcoming is not None:
+        piece, upcoming = upcoming, next(pieces, None)
+        if len(piece) > limit - scanned:
+            piece, truncated, upcoming = piece[:limit - scanned], True, None
+        scanned += len(piece)
+        text = carry + piece.lower()
+        # The last ``overlap`` characters wait for the next window, which also keeps one
+        # character before them for the word-boundary checks
+        stop = len(text) if upcoming is None else max(start, len(text) - scan.overlap)
+        scan.window(text, offset, start, stop)
+        keep_from = max(0, stop - 1)
+        carry, offset, start = text[keep_from:], offset + keep_from, stop - keep_from
+    return scan.result(scanned, truncated)
+
+
+def _cut(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    # Don't leave half a word at the end
+    space = cut.rfind(' ', max(0, limit - 64))
+    return cut[:space] if space > 0 else cut
+
+
+def bound_fields(fields: Dict[str, Optional[str]], budget: int = MAX_MODEL_CHARS) -> Dict[str, str]:
+    """Cut the fields to ``budget`` characters in total.
+
+    Fields shorter than an equal share keep all their text; the longer ones
+    split what is left evenly.
+    """
+    values = {name: value or "" for name, value in fields.items()}
+    if sum(len(value) for value in values.values()) <= budget:
+        return values
+    remaining = budget
+    by_length = sorted(values, key=lambda name: len(values[name]))
+    allowance = {}
+    for position, name in enumerate(by_length):
+        share = remaining // (len(by_length) - position)
+        allowance[name] = min(len(values[name]), share)
+        remaining -= allowance[name]
+    return {name: _cut(value, allowance[name]) for name, value in values.items()}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Time and memory of the rule and ML checks on large postings.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 10_000_000],
+                        help="description sizes in characters")
+    args = parser.parse_args(argv)
+
+    from joblegitchecker2 import JobLegitimacyChecker
+    from orchestrator import ml_input
+    from synthetic_postings import generate_postings
+
+    checker = JobLegitimacyChecker()
+    sample = " ".join(posting["job_description"] for posting in generate_postings(200, seed=0))
+    for size in args.sizes:
+        job = {"job_title": "Data entry clerk", "job_description": (sample * (size // len(sample) + 1))[:size]}
+        started = time.perf_counter()
+        analysis = checker.analyze_job_description(job["job_description"])
+        rules_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        checker.predict_with_proba(ml_input(job))
+        ml_seconds = time.perf_counter() - started
+        # Separate run for memory: tracing slows everything down
+        tracemalloc.start()
+        checker.analyze_job_description(job["job_description"])
+        checker.predict_with_proba(ml_input(job))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{size:>12,} chars  rules {rules_seconds:7.3f}s  ml {ml_seconds:7.3f}s  "
+              f"peak {peak / 2 ** 20:7.1f} MiB  risk {analysis['risk_score']}  "
+              f"truncated {analysis.get('truncated', False)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+"""Compiled scorer for a TF-IDF vectorizer plus linear model.
+
+    python linear_scorer.py export compiled_model/ --tfidf-path tfidf_vectorizer.pkl --model-path model.pkl
+
+``export`` keeps only what the decision function needs:
+
+- the vocabulary, sorted, with terms the model gives zero weight dropped
+  (unless the vectorizer normalizes, in which case they still count towards
+  the norm and keep their IDF);
+- the terms as sorted 64-bit hashes, plus their UTF-8 bytes and offsets
+  (to confirm a hash match and name terms), about 20 bytes per term;
+- float32 IDF and ``coef * idf`` arrays (``--float64`` for exact parity
+  with sklearn, at twice the size);
+- the intercept, classes and tokenizer settings, in ``meta.json``.
+
+``CompiledScorer`` loads the arrays with ``mmap_mode="r"``, so worker
+processes share one page-cache copy. Each call tokenizes the text the way
+the vectorizer would, hashes every distinct token and looks them all up
+in the mmapped hashes with a single ``searchsorted``. The decision value is then a
+sparse dot product, with no sparse-matrix construction or sklearn
+validation in between.
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import re
+import sys
+import unicodedata
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+FORMAT_VERSION = 2
+_META = "meta.json"
+_TERM_HASHES = "term_hashes.npy"
+_TERM_BYTES = "term_bytes.npy"
+_TERM_OFFSETS = "term_offsets.npy"
+_IDF = "idf.npy"
+_WEIGHTS = "weights.npy"
+# Every file of an exported scorer, e.g. to watch or hash the artifact
+ARTIFACT_FILES = (_META, _TERM_HASHES, _TERM_BYTES, _TERM_OFFSETS, _IDF, _WEIGHTS)
+
+
+def _term_hash(term: bytes) -> int:
+    # Stable across processes, unlike hash()
+    return int.from_bytes(hashlib.blake2b(term, digest_size=8).digest(), "little")
+
+
+def _strip_accents_unicode(text: str) -> str:
+    normalized = unicodedata.normalize("NFKD", text)
+    if normalized == text:
+        return text
+    return "".join(c for c in normalized if not unicodedata.combining(c))
+
+
+def _strip_accents_ascii(text: str) -> str:
+    return unicodedata.normalize("NFKD", text).encode("ASCII", "ignore").decode("ASCII")
+
+
+_STRIP_ACCENTS = {None: None, "unicode": _strip_accents_unicode, "ascii": _strip_accents_ascii}
+
+
+def _check_supported(vectorizer, model) -> None:
+    if not hasattr(vectorizer, "vocabulary_"):
+        raise ValueError("export needs a fitted CountVectorizer/TfidfVectorizer with a vocabulary")
+    if vectorizer.analyzer != "word" or vectorizer.tokenizer is not None or vectorizer.preprocessor is not None:
+        raise ValueError("only the built-in word analyzer can be compiled (no custom analyzer/tokenizer/preprocessor)")
+    if vectorizer.strip_accents not in _STRIP_ACCENTS:
+        raise ValueError(f"unsupported strip_accents: {vectorizer.strip_accents!r}")
+    coef = getattr(model, "coef_", None)
+    if coef is None or getattr(model, "intercept_", None) is None:
+        raise ValueError(f"{type(model).__name__} is not a linear model (no coef_/intercept_); "
+                         f"only linear classifiers can be compiled")
+    if np.asarray(coef).shape != (1, len(vectorizer.vocabulary_)) or len(getattr(model, "classes_", ())) != 2:
+        raise ValueError("only binary linear classifiers fitted on this vectorizer's features can be compiled")
+
+
+def _has_logistic_proba(model) -> bool:
+    # Models whose predict_proba is the sigmoid of the decision value
+    name = type(model).__name__
+    if name == "LogisticRegression":
+        return True
+    return name == "SGDClassifier" and getattr(model, "loss", None) in ("log_loss", "log")
+
+
+def export(vectorizer, model, out_dir: str, dtype: str = "float32") -> Dict[str, Any]:
+    """Write the compiled artifact for ``vectorizer`` + ``model`` to ``out_dir``; returns its metadata.
+
+    ``dtype`` is the storage type of the IDF and weight arrays, ``"float64"``
+    or ``"float32"``.
+
+    Raises ValueError for models without a single linear decision function
+    (e.g. a RandomForest) or vectorizers with custom analyzers.
+    """
+    _check_supported(vectorizer, model)
+    if dtype not in ("float64", "float32"):
+        raise ValueError(f"unsupported dtype: {dtype!r}")
+    coef = np.asarray(model.coef_, dtype=np.float64)[0]
+    use_idf = bool(getattr(vectorizer, "use_idf", False))
+    idf = np.asarray(vectorizer.idf_, dtype=np.float64) if use_idf else np.ones(len(coef))
+    norm = getattr(vectorizer, "norm", None)
+
+    terms_by_column = [None] * len(vectorizer.vocabulary_)
+    for term, column in vectorizer.vocabulary_.items():
+        terms_by_column[column] = term
+    # Without normalization a zero-weight term cannot change the decision value
+    keep = [column for column in range(len(coef)) if coef[column] != 0 or norm is not None]
+    encoded = [terms_by_column[column].encode("utf-8") for column in keep]
+    hashes = np.array([_term_hash(term) for term in encoded], dtype=np.uint64)
+    order = np.argsort(hashes, kind="stable")
+    hashes = hashes[order]
+    if len(hashes) > 1 and np.any(hashes[1:] == hashes[:-1]):
+        raise ValueError("two vocabulary terms have the same 64-bit hash; cannot compile")
+    keep = [keep[i] for i in order]
+    encoded = [encoded[i] for i in order]
+    term_bytes = b"".join(encoded)
+    offsets = np.zeros(len(encoded) + 1, dtype=np.uint32 if len(term_bytes) < 2 ** 32 else np.int64)
+    np.cumsum([len(term) for term in encoded], out=offsets[1:])
+
+    os.makedirs(out_dir, exist_ok=True)
+    np.save(os.path.join(out_dir, _TERM_HASHES), hashes)
+    np.save(os.path.join(out_dir, _TERM_BYTES), np.frombuffer(term_bytes, dtype=np.uint8))
+    np.save(os.path.join(out_dir, _TERM_OFFSETS), offsets)
+    np.save(os.path.join(out_dir, _IDF), idf[keep].astype(dtype))
+    np.save(os.path.join(out_dir, _WEIGHTS), (coef[keep] * idf[keep]).astype(dtype))
+
+    stop_words = vectorizer.get_stop_words()
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "lowercase": bool(vectorizer.lowercase),
+        "strip_accents": vectorizer.strip_accents,
+        "token_pattern": vectorizer.token_pattern,
+        "ngram_range": list(vectorizer.ngram_range),
+        "stop_words": sorted(stop_words) if stop_words else [],
+        "binary": bool(vectorizer.binary),
+        "sublinear_tf": bool(getattr(vectorizer, "sublinear_tf", False)),
+        "norm": norm,
+        "intercept": float(np.asarray(model.intercept_)[0]),
+        "classes": [np.asarray(model.classes_)[i].item() for i in range(2)],
+        "logistic_proba": _has_logistic_proba(model),
+        "n_terms": len(keep),
+        "n_weighted_terms": int(np.count_nonzero(coef)),
+        "n_source_terms": len(coef),
+    }
+    with open(os.path.join(out_dir, _META), "w", encoding="utf-8") as handle:
+        json.dump(meta, handle, indent=2)
+    return meta
+
+
+def _build_analyzer(meta: Dict[str, Any]) -> Callable[[str], List[str]]:
+    # Mirrors CountVectorizer's word analyzer: preprocess, tokenize, drop stop words, word n-grams
+    strip_accents = _STRIP_ACCENTS[meta["strip_accents"]]
+    lowercase = meta["lowercase"]
+    token_pattern = re.compile(meta["token_pattern"])
+    if token_pattern.groups > 1:
+        raise ValueError("token_pattern may have at most one capturing group")
+    stop_words = frozenset(meta["stop_words"])
+    min_n, max_n = meta["ngram_range"]
+
+    def analyze(text: str) -> List[str]:
+        if lowercase:
+            text = text.lower()
+        if strip_accents is not None:
+            text = strip_accents(text)
+        tokens = token_pattern.findall(text)
+        if stop_words:
+            tokens = [token for token in tokens if token not in stop_words]
+        if max_n == 1:
+            return tokens
+        ngrams = list(tokens) if min_n == 1 else []
+        for n in range(max(min_n, 2), min(max_n, len(tokens)) + 1):
+            ngrams.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return ngrams
+
+    return analyze
+
+
+class CompiledScorer:
+    def __init__(self, path: str, mmap: bool = True):
+        with open(os.path.join(path, _META), encoding="utf-8") as handle:
+            self.meta = json.load(handle)
+        if self.meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported compiled scorer format {self.meta.get('format_version')!r}; "
+                             f"re-run 'python linear_scorer.py export'")
+        mmap_mode = "r" if mmap else None
+        self.term_hashes = np.load(os.path.join(path, _TERM_HASHES), mmap_mode=mmap_mode)
+        self.term_bytes = np.load(os.path.join(path, _TERM_BYTES), mmap_mode=mmap_mode)
+        self.term_offsets = np.load(os.path.join(path, _TERM_OFFSETS), mmap_mode=mmap_mode)
+        # Plain views of the same pages: slicing a np.memmap costs microseconds per call
+        self._bytes_view = memoryview(np.asarray(self.term_bytes))
+        self._offsets = np.asarray(self.term_offsets)
+        self.idf = np.load(os.path.join(path, _IDF), mmap_mode=mmap_mode)
+        self.weights = np.load(os.path.join(path, _WEIGHTS), mmap_mode=mmap_mode)
+        self.intercept = self.meta["intercept"]
+        self.classes = self.meta["classes"]
+        self._analyze = _build_analyzer(self.meta)
+
+    def _known_terms(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        # Array positions of the text's vocabulary terms and their (normalized) term weights
+        counts = Counter(self._analyze(text))
+        if not counts or not len(self.term_hashes):
+            return np.zeros(0, dtype=np.intp), np.zeros(0)
+        encoded = [token.encode("utf-8") for token in counts]
+        hashes = np.fromiter((_term_hash(token) for token in encoded), dtype=np.uint64, count=len(encoded))
+        positions = np.searchsorted(self.term_hashes, hashes)
+        np.minimum(positions, len(self.term_hashes) - 1, out=positions)
+        found = self.term_hashes[positions] == hashes
+        # A token outside the vocabulary could share a term's hash, so confirm the bytes
+        candidates = np.flatnonzero(found)
+        starts = self._offsets[positions[candidates]].tolist()
+        ends = self._offsets[positions[candidates] + 1].tolist()
+        view = self._bytes_view
+        for index, start, end in zip(candidates.tolist(), starts, ends):
+            if view[start:end] != encoded[index]:
+                found[index] = False
+        if not found.any():
+            return np.zeros(0, dtype=np.intp), np.zeros(0)
+        positions = positions[found]
+        if self.meta["binary"]:
+            tf = np.ones(len(positions))
+        else:
+            tf = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))[found]
+            if self.meta["sublinear_tf"]:
+                tf = np.log(tf) + 1.0
+        norm = self.meta["norm"]
+        if norm == "l2":
+            tf /= float(np.sqrt(np.dot(tf * self.idf[positions], tf * self.idf[positions])))
+        elif norm == "l1":
+            tf /= float(np.sum(np.abs(tf * self.idf[positions])))
+        return positions, tf
+
+    def _term_bytes(self, position: int) -> bytes:
+        return self._bytes_view[self._offsets[position]:self._offsets[position + 1]].tobytes()
+
+    def decision_function(self, text: str) -> float:
+        positions, tf = self._known_terms(text)
+        return float(np.dot(tf, self.weights[positions])) + self.intercept
+
+    def term_contributions(self, text: str) -> List[Tuple[str, float]]:
+        """Each known term's share of the decision value (positive pushes towards ``classes[1]``)."""
+        positions, tf = self._known_terms(text)
+        contributions = tf * self.weights[positions]
+        return [(self._term_bytes(position).decode("utf-8"), float(value))
+                for position, value in zip(positions, contributions)]
+
+    def predict(self, text: str):
+        return self.classes[1] if self.decision_function(text) > 0 else self.classes[0]
+
+    def predict_proba(self, text: str) -> np.ndarray:
+        """``[P(classes[0]), P(classes[1])]``; only for logistic-loss models."""
+        if not self.meta["logistic_proba"]:
+            raise ValueError("the compiled model has no probability estimates")
+        positive = 1.0 / (1.0 + np.exp(-self.decision_function(text)))
+        return np.array([1.0 - positive, positive])
+
+    def predict_many(self, texts: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Predictions and class-1 probabilities (hard predictions when the model has none)."""
+        decisions = np.array([self.decision_function(text) for text in texts], dtype=np.float64)
+        predictions = np.where(decisions > 0, self.classes[1], self.classes[0])
+        if self.meta["logistic_proba"]:
+            positive = 1.0 / (1.0 + np.exp(-decisions))
+        else:
+            positive = (decisions > 0).astype(float)
+        if self.classes[1] != 1:
+            positive = 1.0 - positive if self.classes[0] == 1 else np.zeros(len(decisions))
+        return predictions, positive
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compile a TF-IDF vectorizer and linear model into a fast scorer.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("export", help="write the compiled artifact directory")
+    build.add_argument("output")
+    build.add_argument("--tfidf-path", default="tfidf_vectorizer.pkl")
+    build.add_argument("--model-path", default="model.pkl")
+    build.add_argument("--float64", action="store_true", help="store float64 arrays (exact parity, twice the size)")
+    args = parser.parse_args(argv)
+
+    with open(args.tfidf_path, "rb") as vec_file:
+        vectorizer = pickle.load(vec_file)
+    with open(args.model_path, "rb") as model_file:
+        model = pickle.load(model_file)
+    try:
+        meta = export(vectorizer, model, args.output, dtype="float64" if args.float64 else "float32")
+    except ValueError as error:
+        print(f"error: {error}", file=sys.stderr)
+        return 1
+    size = sum(os.path.getsize(os.path.join(args.output, name)) for name in ARTIFACT_FILES)
+    print(f"wrote {meta['n_terms']} of {meta['n_source_terms']} terms "
+          f"({meta['n_weighted_terms']} with nonzero weight) to {args.output}, {size / 1024:.0f} KiB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
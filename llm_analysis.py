@@ -0,0 +1,357 @@
+import json
+import re
+from typing import Any, Dict, Iterator, List, Optional
+
+from domain_index import BLOCK, UNKNOWN
+from instrumentation import increment, timed
+
+# Indicator names that force a Suspicious verdict when the LLM reports them
+OBVIOUS_NEGATIVE_TERMS = ["pay_upfront","wire_transfer","western_union","money_gram","no_interview","no_experience","guaranteed_income","bank_details","upfront_fee","bitcoin","crypto","send_money"]
+# Negative indicator added when the job URL is on the domain block list
+BLOCKED_DOMAIN_INDICATOR = "blocked_domain"
+# Longest job title, company or URL put into a prompt
+MAX_PROMPT_FIELD_CHARS = 300
+# JSON in a response must start within this many characters, and at most
+# this many candidate openings are tried
+MAX_JSON_SCAN_CHARS = 200_000
+MAX_JSON_ATTEMPTS = 32
+
+
+def _clip(value: str, limit: int = MAX_PROMPT_FIELD_CHARS) -> str:
+    value = str(value)
+    return value if len(value) <= limit else f"{value[:limit]}... [{len(value) - limit:,} more characters]"
+
+
+def _size_note(desc_analysis: Dict[str, Any]) -> str:
+    # Extra risk-indicator line for descriptions scanned in windows (see large_input.py)
+    if "description_chars" not in desc_analysis:
+        return ""
+    note = f"\n- Description Length: {desc_analysis['description_chars']:,} characters"
+    if desc_analysis.get("truncated"):
+        note += f" (rules checked the first {desc_analysis['scanned_chars']:,})"
+    return note
+
+
+def _domain_note(source_verdict: str) -> str:
+    return "BLOCKED (known scam domain)" if source_verdict == BLOCK else source_verdict
+
+
+def extract_json(text: str, kind: type = dict, limit: int = MAX_JSON_SCAN_CHARS) -> Optional[Any]:
+    """First JSON object (or array, with ``kind=list``) in ``text``, or None.
+
+    Decodes from each opening bracket in turn and stops at the first value
+    of the right type, so text after it is never parsed. The cost is bounded
+    by ``limit`` and ``MAX_JSON_ATTEMPTS`` whatever the response size.
+    """
+    opener = "{" if kind is dict else "["
+    decoder = json.JSONDecoder()
+    start = text.find(opener, 0, limit)
+    for _ in range(MAX_JSON_ATTEMPTS):
+        if start == -1:
+            return None
+        try:
+            value, _ = decoder.raw_decode(text, start)
+        except ValueError:
+            value = None
+        if isinstance(value, kind):
+            return value
+        start = text.find(opener, start + 1, limit)
+    return None
+
+
+def build_prompt(job_title: str, company_name: str, job_url: str, validate_url: bool,
+                 in_verified_job_board: bool, desc_analysis: Dict[str, Any], ml_prediction: int,
+                 source_verdict: str = UNKNOWN) -> str:
+    # Comprehensive analysis prompt (original plain-text)
+    return f"""Carefully analyze this job posting for legitimacy:
+
+Job Details:
+- Job Title: {_clip(job_title)}
+- Company: {_clip(company_name)}
+- Job URL: {_clip(job_url)}
+
+Technical Verification:
+- URL Validation: {validate_url}
+- Verified Job Board: {in_verified_job_board}
+- Domain Reputation: {_domain_note(source_verdict)}
+
+Risk Indicators:
+- Red Flags Detected: {desc_analysis.get('red_flag_count', 0)}
+- Suspicious Patterns: {desc_analysis.get('suspicious_pattern_count', 0)}
+- Calculated Risk Score: {desc_analysis.get('risk_score', 0)}{_size_note(desc_analysis)}
+
+Machine Learning Prediction: {'Legitimate' if ml_prediction == 1 else 'Suspicious'}
+
+Comprehensive Analysis Request:
+1. Provide a detailed assessment of the job posting's legitimacy.
+2. Explain the reasoning behind your assessment.
+3. Generate a confidence percentage (0-100%) based on the strength of evidence.
+    - If there is a strong undeniable negative indicator  (e.g., Gibberish), the confidence should be 0%. DO NOT increase confidence if there are no strong positive indicators.
+    - If the prediction is LEGITIMATE, the confidence should naturally tend towards a higher percentage (reflecting higher certainty)
+    - If the prediction is SUSPICIOUS, the confidence should naturally tend towards a lower percentage (reflecting lower certainty)
+4. Highlight specific red flags or positive indicators.
+5. Recommend actions for the job seeker.
+
+Output Format:
+    Prediction: [Legitimate/Suspicious]
+
+    Confidence: [XX%]
+
+    Explanation: [Your detailed reasoning here]
+
+    Your response should be Accurate, Clear, Concise and straight to the point. 
+    Your tone should be friendly but professional.
+"""
+
+
+def build_batch_prompt(entries: List[Dict[str, Any]]) -> str:
+    """One prompt asking for a verdict on each of several postings.
+
+    Each entry has an ``id`` plus the ``build_prompt`` arguments
+    (``job_title``, ``company_name``, ``job_url``, ``validate_url``,
+    ``in_verified_job_board``, ``desc_analysis``, ``ml_prediction`` and
+    optionally ``source_verdict``). The
+    model is asked for a JSON array keyed by those ids; see
+    ``parse_batch_response``.
+    """
+    sections = []
+    for entry in entries:
+        desc_analysis = entry["desc_analysis"]
+        sections.append(f"""Posting ID: {entry['id']}
+- Job Title: {_clip(entry['job_title'])}
+- Company: {_clip(entry['company_name'])}
+- Job URL: {_clip(entry['job_url'])}
+- URL Validation: {entry['validate_url']}
+- Verified Job Board: {entry['in_verified_job_board']}
+- Domain Reputation: {_domain_note(entry.get('source_verdict', UNKNOWN))}
+- Red Flags Detected: {desc_analysis.get('red_flag_count', 0)}
+- Suspicious Patterns: {desc_analysis.get('suspicious_pattern_count', 0)}
+- Calculated Risk Score: {desc_analysis.get('risk_score', 0)}{_size_note(desc_analysis)}
+- Machine Learning Prediction: {'Legitimate' if entry['ml_prediction'] == 1 else 'Suspicious'}""")
+    postings = "\n\n".join(sections)
+    return f"""Carefully analyze each of these {len(entries)} job postings for legitimacy, independently of each other:
+
+{postings}
+
+For each posting:
+1. Assess its legitimacy and explain the reasoning briefly.
+2. Generate a confidence percentage (0-100) based on the strength of evidence.
+    - If there is a strong undeniable negative indicator  (e.g., Gibberish), the confidence should be 0. DO NOT increase confidence if there are no strong positive indicators.
+    - If the prediction is LEGITIMATE, the confidence should naturally tend towards a higher percentage (reflecting higher certainty)
+    - If the prediction is SUSPICIOUS, the confidence should naturally tend towards a lower percentage (reflecting lower certainty)
+3. List specific red flags (negative_indicators) and positive indicators.
+
+Output Format:
+    Only a JSON array with one object per posting, using the Posting ID given above:
+    [{{"id": "<Posting ID>", "prediction": "Legitimate" or "Suspicious", "confidence": <0-100>, "explanation": "<reasoning>", "positive_indicators": [], "negative_indicators": []}}]
+"""
+
+
+def parse_batch_response(response_text: str, entries: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Map each entry id to its parsed verdict; ids the response does not cover are left out.
+
+    Every object goes through ``parse_response``, so the override rules
+    apply per posting exactly as for single prompts.
+    """
+    by_id = {str(entry["id"]): entry for entry in entries}
+    verdicts = {}
+    for item in extract_json(response_text, list) or []:
+        if not isinstance(item, dict):
+            continue
+        entry = by_id.get(str(item.get("id")))
+        if entry is None or str(item["id"]) in verdicts:
+            continue
+        verdicts[str(item["id"])] = parse_response(json.dumps(item), entry["desc_analysis"],
+                                                   entry["in_verified_job_board"],
+                                                   entry.get("source_verdict", UNKNOWN))
+    return verdicts
+
+
+def heuristic_confidence(prediction: str, desc_analysis: Dict[str, Any], in_verified_job_board: bool) -> int:
+    # Fallback heuristic: derive confidence from risk_score
+    risk_score = desc_analysis.get('risk_score', 0)
+    if prediction.lower() == "suspicious":
+        return 0 if risk_score >= 50 else max(10, 50 - (risk_score // 2))
+    elif prediction.lower() == "legitimate":
+        # Only increase confidence when there are positive indicators
+        pos = []
+        if in_verified_job_board:
+            pos.append('verified_job_board')
+        if desc_analysis.get('red_flag_count', 0) == 0 and desc_analysis.get('suspicious_pattern_severity', 0) == 0:
+            pos.append('no_flags')
+        return 60 + min(40, len(pos) * 20)
+    return 50
+
+
+@timed("parse_response")
+def parse_response(response_text: str, desc_analysis: Dict[str, Any], in_verified_job_board: bool,
+                   source_verdict: str = UNKNOWN) -> Dict[str, Any]:
+    """Extract the verdict from an LLM response and apply the deterministic override rules.
+
+    A job URL on the domain index's block list (``source_verdict`` of
+    ``"block"``) always makes the verdict Suspicious with confidence 0.
+
+    Returns a dict with ``prediction``, ``confidence`` (0-100), ``explanation``,
+    ``positive_indicators`` and ``negative_indicators``.
+    """
+    # Try to parse a JSON object from the model response first (preferred)
+    confidence: Optional[int] = None
+    prediction = "Unknown"
+    positive_indicators = []
+    negative_indicators = []
+    explanation = response_text
+
+    # Look for the first JSON object in the response
+    json_obj = extract_json(response_text)
+
+    if json_obj:
+        # Safely extract fields
+        prediction = str(json_obj.get("prediction", "Unknown")).capitalize()
+        try:
+            confidence = int(json_obj.get("confidence", 0))
+        except Exception:
+            confidence = 0
+        positive_indicators = json_obj.get("positive_indicators", []) or []
+        negative_indicators = json_obj.get("negative_indicators", []) or []
+        explanation = json_obj.get("explanation", explanation)
+        # Enforce confidence bounds
+        confidence = max(0, min(100, confidence))
+        # Enforce critical rule: if Calculated Risk Score >=50 or obvious negatives present, force 0
+        if desc_analysis.get('risk_score', 0) >= 50 or any(term in ",".join(negative_indicators).lower() for term in OBVIOUS_NEGATIVE_TERMS):
+            confidence = 0
+            prediction = "Suspicious"
+            increment("confidence_forced_zero")
+    else:
+        # Fallback to regex extraction if JSON not provided
+        increment("parse_fallbacks")
+        prediction_match = re.search(r'Prediction:\s*(Legitimate|Suspicious)', response_text, re.IGNORECASE)
+        confidence_match = re.search(r'Confidence:\s*(\d+)\s*%', response_text, re.IGNORECASE)
+        prediction = prediction_match.group(1).capitalize() if prediction_match else "Unknown"
+        if confidence_match:
+            confidence = int(confidence_match.group(1))
+            confidence = max(0, min(100, confidence))
+        else:
+            increment("heuristic_confidence")
+            confidence = heuristic_confidence(prediction, desc_analysis, in_verified_job_board)
+            if confidence == 0:
+                increment("confidence_forced_zero")
+
+    # Ensure final safety bounds
+    if confidence is None:
+        confidence = 0
+    confidence = int(max(0, min(100, confidence)))
+
+    if source_verdict == BLOCK:
+        prediction, confidence = "Suspicious", 0
+        negative_indicators = list(negative_indicators) + [BLOCKED_DOMAIN_INDICATOR]
+        increment("blocked_domain_overrides")
+
+    return {
+        "prediction": prediction,
+        "confidence": confidence,
+        "explanation": explanation,
+        "positive_indicators": positive_indicators,
+        "negative_indicators": negative_indicators,
+    }
+
+
+# Verdict fields as they appear in the plain-text format or the JSON form; a
+# confidence only counts once its terminator ("%" or a JSON delimiter) arrived
+_STREAM_PREDICTION = re.compile(r'(?:Prediction:\s*|"prediction"\s*:\s*")(Legitimate|Suspicious)\b', re.IGNORECASE)
+_STREAM_CONFIDENCE = re.compile(r'Confidence:\s*(\d+)\s*%|"confidence"\s*:\s*(\d+)\s*[,}\s]', re.IGNORECASE)
+# Longest tail a match can straddle between chunks
+_STREAM_OVERLAP = 64
+
+
+class StreamingVerdictParser:
+    """Pulls the prediction and confidence out of a response while it streams in.
+
+    ``feed`` each chunk and read ``prediction`` / ``confidence`` (None until
+    seen). Only the text since the previous chunk, plus a short overlap, is
+    searched. The values are provisional: ``parse_response`` on the full
+    text gives the final verdict. JSON-form verdicts get the risk-score
+    override early, as parse_response will apply it to them; a blocked
+    domain overrides every verdict.
+    """
+
+    def __init__(self, desc_analysis: Dict[str, Any], source_verdict: str = UNKNOWN):
+        self.desc_analysis = desc_analysis
+        self.source_verdict = source_verdict
+        self.text = ""
+        self.prediction: Optional[str] = None
+        self.confidence: Optional[int] = None
+        self._json = False
+        self._scan_from = 0
+
+    def feed(self, chunk: str) -> None:
+        self.text += chunk
+        window = self.text[self._scan_from:]
+        if self.prediction is None:
+            match = _STREAM_PREDICTION.search(window)
+            if match:
+                self.prediction = match.group(1).capitalize()
+                self._json = match.group(0).startswith('"')
+        if self.confidence is None:
+            match = _STREAM_CONFIDENCE.search(window)
+            if match:
+                self.confidence = max(0, min(100, int(match.group(1) or match.group(2))))
+        self._scan_from = max(0, len(self.text) - _STREAM_OVERLAP)
+
+    def verdict(self) -> Dict[str, Any]:
+        prediction, confidence = self.prediction, self.confidence
+        if self.source_verdict == BLOCK or (self._json and self.desc_analysis.get('risk_score', 0) >= 50):
+            prediction, confidence = "Suspicious", 0
+        return {"prediction": prediction, "confidence": confidence}
+
+
+class _StubResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubLLM:
+    """Offline stand-in for the Gemini model with the same ``generate_content`` interface.
+
+    It answers in the expected plain-text format from the facts already in
+    the prompt (ML prediction and risk score), so bulk runs and tests can
+    exercise the full parsing path without network access.
+    """
+
+    model_name = "local-stub"
+
+    def generate_content(self, prompt: str, stream: bool = False):
+        response = self._respond(prompt)
+        if stream:
+            return self._stream(response.text)
+        return response
+
+    @staticmethod
+    def _stream(text: str) -> Iterator[_StubResponse]:
+        # Chunked like a streamed Gemini response
+        for start in range(0, len(text), 16):
+            yield _StubResponse(text[start:start + 16])
+
+    def _respond(self, prompt: str) -> _StubResponse:
+        if "Posting ID:" in prompt:
+            # Batched prompt: one JSON object per posting section
+            answers = []
+            for section in prompt.split("Posting ID:")[1:]:
+                prediction, confidence, risk_score = self._verdict(section)
+                answers.append({"id": section.split()[0], "prediction": prediction, "confidence": confidence,
+                                "explanation": f"Local stub verdict with a risk score of {risk_score}.",
+                                "positive_indicators": [], "negative_indicators": []})
+            return _StubResponse(json.dumps(answers))
+        prediction, confidence, risk_score = self._verdict(prompt)
+        return _StubResponse(f"Prediction: {prediction}\n\nConfidence: {confidence}%\n\n"
+                             f"Explanation: Local stub verdict from the ML prediction and a risk score of {risk_score}.")
+
+    @staticmethod
+    def _verdict(prompt: str):
+        ml_match = re.search(r'Machine Learning Prediction:\s*(Legitimate|Suspicious)', prompt)
+        risk_match = re.search(r'Calculated Risk Score:\s*(\d+)', prompt)
+        risk_score = int(risk_match.group(1)) if risk_match else 0
+        prediction = ml_match.group(1) if ml_match else "Suspicious"
+        if risk_score >= 50:
+            prediction = "Suspicious"
+        confidence = max(0, (80 if prediction == "Legitimate" else 40) - risk_score)
+        return prediction, confidence, risk_score
@@ -0,0 +1,175 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from instrumentation import increment, stage
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_prompt(prompt: str) -> str:
+    # Formatting-only differences (indentation, trailing spaces) must not miss the cache
+    return _WHITESPACE.sub(' ', prompt).strip()
+
+
+def model_name_of(model: Any) -> str:
+    return getattr(model, "model_name", None) or type(model).__name__
+
+
+class LLMResponseCache:
+    """Content-addressed cache for LLM responses.
+
+    Keys are the SHA-256 of the model name and the normalized prompt. Lookups
+    go to an in-memory LRU first and then to an optional SQLite file, so
+    cached answers survive restarts and are shared by processes using the
+    same file. Both tiers honour the TTL and their own size cap.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = 24 * 3600,
+                 disk_path: Optional[str] = None, max_disk_entries: int = 100_000):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._db = None
+        if disk_path:
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_responses ("
+                " key TEXT PRIMARY KEY, model TEXT NOT NULL,"
+                " response TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_created ON llm_responses(created)")
+            self._db.commit()
+
+    @staticmethod
+    def make_key(prompt: str, model_name: str) -> str:
+        payload = f"{model_name}\x00{normalize_prompt(prompt)}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl is not None and now - created > self.ttl
+
+    def get(self, prompt: str, model_name: str) -> Optional[str]:
+        key = self.make_key(prompt, model_name)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry[0], now):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._memory[key]
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT response, created FROM llm_responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and not self._expired(row[1], now):
+                    self._remember(key, row[1], row[0])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return row[0]
+            self.misses += 1
+            return None
+
+    def _remember(self, key: str, created: float, response: str) -> None:
+        self._memory[key] = (created, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def set(self, prompt: str, model_name: str, response: str) -> None:
+        key = self.make_key(prompt, model_name)
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, response)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_responses (key, model, response, created) VALUES (?, ?, ?, ?)",
+                    (key, model_name, response, now),
+                )
+                if self.ttl is not None:
+                    self._db.execute("DELETE FROM llm_responses WHERE created < ?", (now - self.ttl,))
+                self._db.execute(
+                    "DELETE FROM llm_responses WHERE key IN ("
+                    " SELECT key FROM llm_responses ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                    (self.max_disk_entries,),
+                )
+                self._db.commit()
+
+    def generate(self, model: Any, prompt: str) -> str:
+        """Return the response text for ``prompt``, calling ``model.generate_content`` only on a miss."""
+        model_name = model_name_of(model)
+        cached = self.get(prompt, model_name)
+        if cached is not None:
+            increment("llm_cache_hits")
+            return cached
+        increment("llm_calls")
+        with stage("llm"):
+            response_text = model.generate_content(prompt).text
+        self.set(prompt, model_name, response_text)
+        return response_text
+
+    def generate_stream(self, model: Any, prompt: str) -> Iterator[str]:
+        """Like ``generate``, but yields the response text chunk by chunk as the model streams it.
+
+        A cached response is yielded as a single chunk; a streamed one is
+        cached once it is complete.
+        """
+        model_name = model_name_of(model)
+        cached = self.get(prompt, model_name)
+        if cached is not None:
+            increment("llm_cache_hits")
+            yield cached
+            return
+        increment("llm_calls")
+        parts = []
+        with stage("llm"):
+            for chunk in model.generate_content(prompt, stream=True):
+                parts.append(chunk.text)
+                yield parts[-1]
+        self.set(prompt, model_name, "".join(parts))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_responses")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "memory_entries": len(self._memory),
+            }
+
+
+_cache: Optional[LLMResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMResponseCache:
+    # Process-wide cache; LLM_CACHE_PATH enables the on-disk tier, LLM_CACHE_TTL sets the TTL in seconds
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMResponseCache(
+                    max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024")),
+                    ttl=float(os.getenv("LLM_CACHE_TTL", str(24 * 3600))),
+                    disk_path=os.getenv("LLM_CACHE_PATH") or None,
+                )
+    return _cache
@@ -0,0 +1,237 @@
+"""Rate-limited, batched scheduling of LLM verdicts for many postings.
+
+    python fake_llm_server.py --port 8766 --rpm 60 &
+    python llm_scheduler.py --url http://127.0.0.1:8766 --count 300 --batch-size 8 --rpm 60
+
+``LLMScheduler.analyze`` takes postings whose local checks already ran and
+returns one verdict per posting, in order. Postings are packed
+``batch_size`` to a prompt (``build_batch_prompt``), and each request waits
+on the optional request-per-minute and token-per-minute buckets (both off
+by default, e.g. for a local model; set them from the provider's quota). At most
+``max_concurrency`` requests are in flight. Rate-limit and transient
+errors are retried with exponential backoff. Postings that a batched
+answer leaves out are retried alone with the single-posting prompt, and
+postings that still fail get the local fallback verdict.
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from domain_index import UNKNOWN
+from instrumentation import increment
+from llm_analysis import build_batch_prompt, build_prompt, parse_batch_response, parse_response
+from orchestrator import fallback_verdict
+
+# HTTP statuses and exception names (google.api_core, requests, urllib) worth retrying
+RETRY_STATUS = (408, 429, 500, 502, 503, 504)
+RETRY_ERRORS = ("ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "DeadlineExceeded",
+                "InternalServerError", "GatewayTimeout")
+# Rough prompt size estimate for the token bucket
+CHARS_PER_TOKEN = 4
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at ``rate`` tokens per second."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """Take ``amount`` tokens, sleeping until they are available; returns the seconds waited."""
+        # A request larger than the bucket would otherwise wait forever
+        amount = min(amount, self.capacity)
+        started = self._clock()
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return now - started
+                delay = (amount - self._tokens) / self.rate
+            self._sleep(delay)
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "code", None)
+    if callable(status):
+        status = status()
+    return status in RETRY_STATUS or type(error).__name__ in RETRY_ERRORS
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    # Honour a server's Retry-After header when the error carries one
+    headers = getattr(error, "headers", None)
+    value = headers.get("Retry-After") if headers is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _entry(posting_id: str, task: Dict[str, Any]) -> Dict[str, Any]:
+    job, checks = task["job"], task["checks"]
+    return dict(checks, id=posting_id, job_title=job.get("job_title", ""),
+                company_name=job.get("company_name", ""), job_url=job.get("job_url", ""))
+
+
+class LLMScheduler:
+    def __init__(self, llm: Any, generate: Optional[Callable[[Any, str], str]] = None, batch_size: int = 1,
+                 max_concurrency: int = 4, requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None, max_retries: int = 4, backoff_base: float = 1.0,
+                 backoff_max: float = 30.0, sleep: Callable[[float], None] = time.sleep):
+        if batch_size < 1 or max_concurrency < 1:
+            raise ValueError("batch_size and max_concurrency must be at least 1")
+        self.llm = llm
+        if generate is None:
+            from llm_cache import get_llm_cache
+            generate = get_llm_cache().generate
+        self.generate = generate
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._sleep = sleep
+        # Allow a burst of up to max_concurrency requests, then the steady rate
+        self._requests = (TokenBucket(requests_per_minute / 60.0, max(1.0, float(max_concurrency)))
+                          if requests_per_minute else None)
+        self._tokens = (TokenBucket(tokens_per_minute / 60.0, tokens_per_minute)
+                        if tokens_per_minute else None)
+        self._stats_lock = threading.Lock()
+        self.stats: Dict[str, float] = {"postings": 0, "requests": 0, "retries": 0, "failures": 0,
+                                        "unmatched": 0, "rate_limit_wait_seconds": 0.0, "seconds": 0.0}
+
+    def _count(self, name: str, amount: float = 1) -> None:
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def _call(self, prompt: str) -> str:
+        attempt = 0
+        while True:
+            waited = self._requests.acquire() if self._requests is not None else 0.0
+            if self._tokens is not None:
+                waited += self._tokens.acquire(len(prompt) / CHARS_PER_TOKEN)
+            self._count("rate_limit_wait_seconds", waited)
+            self._count("requests")
+            try:
+                return self.generate(self.llm, prompt)
+            except Exception as error:
+                if attempt >= self.max_retries or not is_retryable(error):
+                    raise
+                attempt += 1
+                self._count("retries")
+                increment("llm_retries")
+                delay = _retry_after(error)
+                if delay is None:
+                    # Full jitter keeps concurrent workers from retrying in lockstep
+                    delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                self._sleep(delay)
+
+    def _single(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        job, checks = task["job"], task["checks"]
+        prompt = build_prompt(job.get("job_title", ""), job.get("company_name", ""), job.get("job_url", ""),
+                              checks["validate_url"], checks["in_verified_job_board"],
+                              checks["desc_analysis"], checks["ml_prediction"],
+                              checks.get("source_verdict", UNKNOWN))
+        try:
+            response_text = self._call(prompt)
+        except Exception as error:
+            return self._failed(task, error)
+        return dict(parse_response(response_text, checks["desc_analysis"], checks["in_verified_job_board"],
+                                   checks.get("source_verdict", UNKNOWN)),
+                    response_text=response_text)
+
+    def _failed(self, task: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+        self._count("failures")
+        verdict = fallback_verdict(task["checks"])
+        return dict(verdict, response_text=verdict["explanation"], llm_error=repr(error))
+
+    def _batch(self, tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if len(tasks) == 1:
+            return [self._single(tasks[0])]
+        # Short positional ids: nothing from the posting itself is trusted as a key
+        entries = [_entry(f"P{i + 1}", task) for i, task in enumerate(tasks)]
+        try:
+            response_text = self._call(build_batch_prompt(entries))
+        except Exception as error:
+            return [self._failed(task, error) for task in tasks]
+        verdicts = parse_batch_response(response_text, entries)
+        results = []
+        for entry, task in zip(entries, tasks):
+            verdict = verdicts.get(entry["id"])
+            if verdict is None:
+                self._count("unmatched")
+                results.append(self._single(task))
+            else:
+                results.append(dict(verdict, response_text=verdict["explanation"]))
+        return results
+
+    def analyze(self, tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Verdicts for ``tasks`` (dicts with the posting ``job`` and its local ``checks``), in input order.
+
+        Each verdict has the ``parse_response`` fields plus ``response_text``;
+        postings whose LLM call failed get the fallback verdict and ``llm_error``.
+        """
+        started = time.monotonic()
+        batches = [tasks[start:start + self.batch_size] for start in range(0, len(tasks), self.batch_size)]
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="llm-scheduler") as pool:
+            results = [verdict for batch in pool.map(self._batch, batches) for verdict in batch]
+        self._count("postings", len(tasks))
+        self._count("seconds", time.monotonic() - started)
+        return results
+
+    def postings_per_minute(self) -> float:
+        with self._stats_lock:
+            seconds = self.stats["seconds"]
+            return self.stats["postings"] * 60.0 / seconds if seconds else 0.0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure LLM scheduler throughput against an LLM endpoint.")
+    parser.add_argument("--url", default="http://127.0.0.1:8766", help="fake_llm_server.py endpoint")
+    parser.add_argument("--count", type=int, default=200, help="synthetic postings to analyze")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rpm", type=float, default=60, help="requests per minute")
+    parser.add_argument("--tpm", type=float, default=None, help="prompt tokens per minute")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    from fake_llm_server import FakeLLMClient
+    from joblegitchecker2 import JobLegitimacyChecker
+    from orchestrator import run_local_checks
+    from synthetic_postings import generate_postings
+
+    checker = JobLegitimacyChecker()
+    tasks = [{"job": job, "checks": run_local_checks(checker, job)}
+             for job in generate_postings(args.count, seed=args.seed)]
+    scheduler = LLMScheduler(FakeLLMClient(args.url), generate=lambda llm, prompt: llm.generate_content(prompt).text,
+                             batch_size=args.batch_size, max_concurrency=args.concurrency,
+                             requests_per_minute=args.rpm, tokens_per_minute=args.tpm)
+    results = scheduler.analyze(tasks)
+    stats = scheduler.stats
+    print(f"{len(results)} postings in {stats['seconds']:.1f}s: {scheduler.postings_per_minute():,.0f} postings/min")
+    print(f"requests {stats['requests']:.0f}  retries {stats['retries']:.0f}  failures {stats['failures']:.0f}  "
+          f"unmatched {stats['unmatched']:.0f}  rate-limit wait {stats['rate_limit_wait_seconds']:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
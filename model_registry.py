@@ -0,0 +1,143 @@
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from joblegitchecker2 import JobLegitimacyChecker, file_hash
+
+logger = logging.getLogger(__name__)
+
+
+def _stat_signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class ModelRegistry:
+    """Process-wide holder of the warm checker and LLM clients.
+
+    The checker is rebuilt only when one of its artifact files changes: a
+    cheap stat() is compared first and the file is re-hashed only when the
+    mtime/size moved, so touching a file without changing it keeps the
+    loaded model. All methods are safe to call from concurrent sessions.
+    """
+
+    def __init__(self, tfidf_path: str = "tfidf_vectorizer.pkl", model_path: str = "model.pkl",
+                 check_interval: float = 1.0, compiled_scorer_path: Optional[str] = None):
+        self.tfidf_path = tfidf_path
+        self.model_path = model_path
+        self.compiled_scorer_path = compiled_scorer_path or os.getenv("JOB_ANALYZER_COMPILED_SCORER")
+        self.check_interval = check_interval
+        self._lock = threading.RLock()
+        self._checker: Optional[JobLegitimacyChecker] = None
+        self._stats: Dict[str, Optional[Tuple[int, int]]] = {}
+        self._hashes: Dict[str, Optional[str]] = {}
+        self._last_check = 0.0
+        self._llm_clients: Dict[Tuple[str, str], Any] = {}
+        self._warm_thread: Optional[threading.Thread] = None
+        self.reload_count = 0
+
+    @property
+    def artifact_paths(self) -> Tuple[str, ...]:
+        if self.compiled_scorer_path:
+            # The same files the checker hashes for its model version
+            from linear_scorer import ARTIFACT_FILES
+            return tuple(os.path.join(self.compiled_scorer_path, name) for name in ARTIFACT_FILES)
+        return self.tfidf_path, self.model_path
+
+    def _artifacts_changed(self) -> bool:
+        changed = False
+        for path in self.artifact_paths:
+            signature = _stat_signature(path)
+            if signature == self._stats.get(path, ()):
+                continue
+            self._stats[path] = signature
+            digest = file_hash(path) if signature else None
+            if digest != self._hashes.get(path):
+                self._hashes[path] = digest
+                changed = True
+        return changed
+
+    def artifact_version(self) -> str:
+        # Stable identifier of the loaded artifacts, e.g. for result caches
+        return self.get_checker().model_version()
+
+    def _load(self) -> None:
+        self._checker = JobLegitimacyChecker(self.tfidf_path, self.model_path,
+                                             compiled_scorer_path=self.compiled_scorer_path)
+        self.reload_count += 1
+
+    def get_checker(self) -> JobLegitimacyChecker:
+        now = time.monotonic()
+        checker = self._checker
+        if checker is not None and now - self._last_check < self.check_interval:
+            return checker
+        with self._lock:
+            if self._checker is None:
+                self._artifacts_changed()
+                self._load()
+            elif now - self._last_check >= self.check_interval and self._artifacts_changed():
+                self._load()
+            self._last_check = now
+            return self._checker
+
+    def get_llm(self, api_key: str, factory: Callable[[str], Any]) -> Any:
+        # One client per (api key, factory); configuring the client is not repeated per request.
+        # Keyed by name because Streamlit re-creates the factory function on every rerun.
+        key = (api_key, f"{getattr(factory, '__module__', '')}.{getattr(factory, '__qualname__', repr(factory))}")
+        client = self._llm_clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._llm_clients.get(key)
+                if client is None:
+                    client = factory(api_key)
+                    self._llm_clients[key] = client
+        return client
+
+    def warm(self, api_key: Optional[str] = None,
+             llm_factory: Optional[Callable[[str], Any]] = None) -> None:
+        self.get_checker()
+        if api_key and llm_factory is not None:
+            self.get_llm(api_key, llm_factory)
+
+    def warm_in_background(self, api_key: Optional[str] = None,
+                           llm_factory: Optional[Callable[[str], Any]] = None) -> threading.Thread:
+        """Run ``warm`` in a daemon thread so the caller can start serving right away.
+
+        A request that needs the checker before it is loaded waits for it on the
+        registry lock. Only one warm-up runs at a time; once the checker is
+        loaded, later calls return the finished thread.
+        """
+        with self._lock:
+            thread = self._warm_thread
+            if thread is not None and (thread.is_alive() or self._checker is not None):
+                return thread
+            thread = self._warm_thread = threading.Thread(target=self._warm_logged, args=(api_key, llm_factory),
+                                                          name="model-warmup", daemon=True)
+            thread.start()
+            return thread
+
+    def _warm_logged(self, api_key: Optional[str], llm_factory: Optional[Callable[[str], Any]]) -> None:
+        try:
+            self.warm(api_key, llm_factory)
+        except Exception:
+            # The request path retries and reports the error itself
+            logger.exception("Background warm-up failed")
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ModelRegistry:
+    # Module state survives Streamlit script reruns, so this is shared by every session
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry()
+    return _registry
@@ -0,0 +1,221 @@
+"""Near-duplicate detection for reposted job postings (MinHash + LSH banding).
+
+Postings are compared on the preprocessed combined text the ML model sees,
+as sets of word shingles. Each posting gets a MinHash signature whose
+agreement rate estimates Jaccard similarity; signatures are split into
+bands and hashed into buckets, so a lookup only inspects postings sharing
+at least one band with the query instead of scanning the whole index.
+"""
+import json
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Set, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# numpy is imported on first use, so importing this module (and app.py) stays cheap;
+# see import_budget.py
+
+# Prime just above 2**32 for the universal hash family (a * x + b) mod p
+_PRIME = 4294967311
+_MAX_HASH = 0xFFFFFFFF
+# Shingles hashed per block, to keep memory flat on very long texts
+_BLOCK = 4096
+
+
+def _shingles(text: str, size: int) -> Set[str]:
+    # Texts shorter than one shingle have none: a lone word or two says nothing about duplication
+    words = text.split()
+    if len(words) < size:
+        return set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _shingle_hash(shingle: str) -> int:
+    # Stable across processes (unlike hash()), so saved signatures stay comparable
+    return zlib.crc32(shingle.encode("utf-8"))
+
+
+def choose_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """Pick (bands, rows) with the highest LSH threshold (1/b)**(1/r) not above ``threshold``.
+
+    Staying at or below the target keeps pairs near the threshold likely to
+    share a bucket; the exact similarity check then filters candidates.
+    """
+    best = (num_perm, 1)
+    best_threshold = -1.0
+    for bands in range(1, num_perm + 1):
+        if num_perm % bands:
+            continue
+        rows = num_perm // bands
+        lsh_threshold = (1.0 / bands) ** (1.0 / rows)
+        if best_threshold < lsh_threshold <= threshold:
+            best, best_threshold = (bands, rows), lsh_threshold
+    return best
+
+
+def _is_empty(signature: "np.ndarray") -> bool:
+    # The signature of a text without shingles, e.g. from an index saved before those were skipped
+    return bool((signature == _MAX_HASH).all())
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = 128, shingle_size: int = 3, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.seed = seed
+        import numpy as np
+        rng = np.random.RandomState(seed)
+        # a, b < 2**31 keeps a * x + b (x < 2**32) inside uint64
+        self._a = rng.randint(1, 2 ** 31, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, 2 ** 31, size=num_perm).astype(np.uint64)
+
+    def signature(self, text: str) -> Optional["np.ndarray"]:
+        """MinHash signature of ``text``, or None when it has no shingles.
+
+        Without shingles every slot would stay at the maximum, and all such
+        texts would look identical to each other.
+        """
+        import numpy as np
+        hashes = np.fromiter((_shingle_hash(s) for s in _shingles(text, self.shingle_size)), dtype=np.uint64)
+        if not len(hashes):
+            return None
+        signature = np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        prime = np.uint64(_PRIME)
+        for start in range(0, len(hashes), _BLOCK):
+            block = hashes[start:start + _BLOCK]
+            permuted = (np.outer(self._a, block) + self._b[:, None]) % prime
+            np.minimum(signature, permuted.min(axis=1), out=signature)
+        return np.minimum(signature, np.uint64(_MAX_HASH)).astype(np.uint32)
+
+
+class NearDuplicateIndex:
+    """Bounded, incrementally updated LSH index mapping postings to their verdicts.
+
+    ``max_items`` caps memory; the least recently inserted or matched
+    posting is evicted first. ``query`` returns ``(key, similarity, verdict)``
+    for the most similar indexed posting at or above ``threshold``. Texts
+    too short to have a shingle are neither indexed nor matched.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, shingle_size: int = 3,
+                 max_items: int = 100_000, bands: Optional[int] = None, seed: int = 1):
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("threshold must be in (0, 1]")
+        self.threshold = threshold
+        self.max_items = max_items
+        self.hasher = MinHasher(num_perm, shingle_size, seed)
+        if bands is None:
+            bands, _ = choose_bands(threshold, num_perm)
+        if num_perm % bands:
+            raise ValueError("bands must divide num_perm")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._tables: List[Dict[bytes, Set[str]]] = [{} for _ in range(bands)]
+        self._items: "OrderedDict[str, Tuple[np.ndarray, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._items
+
+    def _band_keys(self, signature: "np.ndarray") -> Iterable[Tuple[int, bytes]]:
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def _remove(self, key: str) -> None:
+        signature, _ = self._items.pop(key)
+        for band, band_key in self._band_keys(signature):
+            bucket = self._tables[band].get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._tables[band][band_key]
+
+    def insert(self, key: str, text: str, verdict: Any) -> None:
+        self.insert_signature(key, self.hasher.signature(text), verdict)
+
+    def insert_signature(self, key: str, signature: Optional["np.ndarray"], verdict: Any) -> None:
+        if signature is None or _is_empty(signature):
+            return
+        with self._lock:
+            if key in self._items:
+                self._remove(key)
+            self._items[key] = (signature, verdict)
+            for band, band_key in self._band_keys(signature):
+                self._tables[band].setdefault(band_key, set()).add(key)
+            while len(self._items) > self.max_items:
+                self._remove(next(iter(self._items)))
+
+    def query(self, text: str) -> Optional[Tuple[str, float, Any]]:
+        return self.query_signature(self.hasher.signature(text))
+
+    def query_signature(self, signature: Optional["np.ndarray"]) -> Optional[Tuple[str, float, Any]]:
+        if signature is None or _is_empty(signature):
+            return None
+        with self._lock:
+            candidates: Set[str] = set()
+            for band, band_key in self._band_keys(signature):
+                candidates.update(self._tables[band].get(band_key, ()))
+            best = None
+            for key in candidates:
+                similarity = float((self._items[key][0] == signature).mean())
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (key, similarity)
+            if best is None:
+                return None
+            self._items.move_to_end(best[0])
+            return best[0], best[1], self._items[best[0]][1]
+
+    def save(self, path: str) -> None:
+        """Write the index to an ``.npz`` file (signatures as an array, keys and verdicts as JSON)."""
+        import numpy as np
+        with self._lock:
+            keys = list(self._items)
+            signatures = (np.stack([self._items[key][0] for key in keys]) if keys
+                          else np.zeros((0, self.hasher.num_perm), dtype=np.uint32))
+            meta = {
+                "threshold": self.threshold,
+                "num_perm": self.hasher.num_perm,
+                "shingle_size": self.hasher.shingle_size,
+                "seed": self.hasher.seed,
+                "bands": self.bands,
+                "max_items": self.max_items,
+                "keys": keys,
+                "verdicts": [self._items[key][1] for key in keys],
+            }
+        tmp_path = path + ".tmp.npz"
+        np.savez_compressed(tmp_path, signatures=signatures, meta=np.array(json.dumps(meta)))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "NearDuplicateIndex":
+        import numpy as np
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            signatures = data["signatures"]
+        index = cls(threshold=meta["threshold"], num_perm=meta["num_perm"], shingle_size=meta["shingle_size"],
+                    max_items=meta["max_items"], bands=meta["bands"], seed=meta["seed"])
+        for key, signature, verdict in zip(meta["keys"], signatures, meta["verdicts"]):
+            index.insert_signature(key, signature, verdict)
+        return index
+
+
+_index: Optional[NearDuplicateIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_near_duplicate_index() -> NearDuplicateIndex:
+    # Process-wide index; JOB_ANALYZER_DEDUP_PATH loads a previously saved one
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                path = os.getenv("JOB_ANALYZER_DEDUP_PATH")
+                _index = NearDuplicateIndex.load(path) if path and os.path.exists(path) else NearDuplicateIndex()
+    return _index
@@ -0,0 +1,357 @@
+import functools
+import hashlib
+import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from domain_index import BLOCK
+from instrumentation import bind_trace, increment, observe_size, trace_request
+from large_input import bound_fields
+from llm_analysis import (BLOCKED_DOMAIN_INDICATOR, StreamingVerdictParser, build_prompt, heuristic_confidence,
+                          parse_response)
+
+# Seconds the LLM stage may take before the verdict falls back to the local checks
+DEFAULT_LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+
+# Shared pool for the local checks, which always finish quickly
+_executor = ThreadPoolExecutor(max_workers=int(os.getenv("ANALYSIS_WORKERS", "8")),
+                               thread_name_prefix="job-analysis")
+# LLM calls get their own pool: a timed-out call keeps its worker until it returns
+# (a per-request pool would block on shutdown waiting for it), and stuck calls
+# must not starve the local checks the fallback verdict is built from
+_llm_executor = ThreadPoolExecutor(max_workers=int(os.getenv("LLM_WORKERS", "8")),
+                                   thread_name_prefix="job-analysis-llm")
+
+
+def ml_input(job: Dict[str, str]) -> Dict[str, str]:
+    # Prepare ML prediction data, capped at MAX_MODEL_CHARS in total (see large_input.py)
+    return bound_fields({
+        "title": job.get("job_title", ""),
+        "company_profile": job.get("company_profile", ""),
+        "description": job.get("job_description", ""),
+        "requirements": job.get("requirements", ""),
+        "benefits": job.get("benefits", ""),
+    })
+
+
+def run_local_checks(checker, job: Dict[str, str]) -> Dict[str, Any]:
+    """Run the rule, URL, domain and ML checks, the two heavy ones concurrently."""
+    desc_future = _executor.submit(bind_trace(checker.analyze_job_description), job.get("job_description", ""))
+    ml_future = _executor.submit(bind_trace(checker.predict_with_proba), ml_input(job))
+    # The URL checks are microseconds, so they run here while the pool works
+    job_url = job.get("job_url", "")
+    validate_url = checker.validate_url(job_url)
+    in_verified_job_board = checker.verify_job_source(job_url)
+    source_verdict = checker.source_verdict(job_url)
+    ml_prediction, ml_probability = ml_future.result()
+    return {
+        "validate_url": validate_url,
+        "in_verified_job_board": in_verified_job_board,
+        "source_verdict": source_verdict,
+        "desc_analysis": desc_future.result(),
+        "ml_prediction": ml_prediction,
+        "ml_probability": ml_probability,
+    }
+
+
+def fallback_verdict(checks: Dict[str, Any], timed_out: bool = False) -> Dict[str, Any]:
+    """Verdict from the local checks alone, used when there is no LLM or it was too slow (``timed_out``)."""
+    desc_analysis = checks["desc_analysis"]
+    prediction = "Legitimate" if checks["ml_prediction"] == 1 else "Suspicious"
+    if desc_analysis.get('risk_score', 0) >= 50:
+        prediction = "Suspicious"
+    confidence = heuristic_confidence(prediction, desc_analysis, checks["in_verified_job_board"])
+    negative_indicators = []
+    if checks.get("source_verdict") == BLOCK:
+        prediction, confidence, negative_indicators = "Suspicious", 0, [BLOCKED_DOMAIN_INDICATOR]
+    flags = ", ".join(desc_analysis["red_flag_matches"]) or "none"
+    basis = (f"the rule checks (risk score {desc_analysis.get('risk_score', 0)}, red flags: {flags}) "
+             f"and the ML model.")
+    if timed_out:
+        explanation = f"The AI assessment was not available in time, so this verdict is based on {basis}"
+    else:
+        explanation = f"This verdict is based on {basis}"
+    if negative_indicators:
+        explanation += " The job URL is on the blocked domain list."
+    return {
+        "prediction": prediction,
+        "confidence": confidence,
+        "explanation": explanation,
+        "positive_indicators": [],
+        "negative_indicators": negative_indicators,
+    }
+
+
+# Result fields reused when a near-duplicate posting was already analysed
+_REUSABLE_FIELDS = ("desc_analysis", "ml_prediction", "prediction", "confidence", "explanation",
+                    "positive_indicators", "negative_indicators", "response_text")
+
+
+def analyze_posting(checker, job: Dict[str, str], llm: Any = None,
+                    generate: Optional[Callable[[Any, str], str]] = None,
+                    llm_timeout: Optional[float] = None, near_duplicates=None, result_store=None,
+                    model_version: Optional[str] = None, cascade=None) -> Dict[str, Any]:
+    """Run the full analysis for one posting.
+
+    ``job`` uses the app's field names (``company_name``, ``job_title``,
+    ``job_description``, ``job_url``, ``company_profile``, ``requirements``,
+    ``benefits``). ``generate(llm, prompt)`` returns the response text and
+    defaults to the shared response cache. When ``llm`` is None or the call
+    exceeds ``llm_timeout`` seconds the heuristic verdict is returned with
+    ``llm_timed_out`` set accordingly.
+
+    With a ``near_duplicates`` index (see near_duplicates.py), a posting
+    whose text closely matches one analysed before reuses that verdict
+    (``duplicate_of`` and ``similarity`` are set) and skips the ML and LLM
+    stages, provided the rule checks, which always run on the new text,
+    find the same matches as before and a risk score below 50, and the
+    URL checks, domain verdict and company name are unchanged. Fresh
+    results are added to the index.
+
+    With a ``result_store`` (see result_store.py), an identical earlier
+    submission analysed under the same model version, rules version and
+    LLM model is returned from the store (``from_store`` is set), and new
+    results are saved to it. The model version defaults to
+    ``checker.model_version()``; pass ``model_version`` only to override it.
+
+    With a ``cascade`` (see decision_cascade.py), postings the rule or ML
+    stage already decides skip the LLM. Every result names the stage that
+    decided it in ``resolved_by``.
+    """
+    with trace_request(job_url=job.get("job_url", "")) as trace:
+        combined_text = None
+        result = _from_store(checker, job, llm, result_store, model_version)
+        if result is None and near_duplicates is not None:
+            combined_text = checker.combine_text(ml_input(job))
+            result = _reuse_duplicate(checker, job, near_duplicates.query(combined_text))
+        if result is None:
+            result = _analyze_posting(checker, job, llm, generate, llm_timeout, cascade)
+            _remember(checker, job, near_duplicates, combined_text, result)
+        if not result.get("from_store"):
+            _save(checker, job, llm, result_store, model_version, result)
+        _finish_trace(trace, result, cascade)
+        return result
+
+
+def analyze_posting_stream(checker, job: Dict[str, str], llm: Any = None,
+                           stream: Optional[Callable[[Any, str], Iterator[str]]] = None,
+                           llm_timeout: Optional[float] = None, near_duplicates=None, result_store=None,
+                           model_version: Optional[str] = None, cascade=None) -> Iterator[Dict[str, Any]]:
+    """Streaming variant of ``analyze_posting`` that yields progress events.
+
+    ``stream(llm, prompt)`` yields response text chunks and defaults to the
+    shared cache's ``generate_stream``. While chunks arrive, events
+    ``{"event": "chunk", "text", "response_text", "prediction", "confidence"}``
+    carry the provisional verdict (None until the model has stated it). The
+    last event is ``{"event": "result", "result": ...}`` with the same dict
+    ``analyze_posting`` returns, after the full-text parse and override rules.
+    ``llm_timeout`` bounds the whole stream.
+    """
+    with trace_request(job_url=job.get("job_url", "")) as trace:
+        combined_text = None
+        result = _from_store(checker, job, llm, result_store, model_version)
+        if result is None and near_duplicates is not None:
+            combined_text = checker.combine_text(ml_input(job))
+            result = _reuse_duplicate(checker, job, near_duplicates.query(combined_text))
+            if result is not None:
+                _save(checker, job, llm, result_store, model_version, result)
+        if result is not None:
+            _finish_trace(trace, result, cascade)
+            yield {"event": "result", "result": result}
+            return
+
+        checks, result = _prepare(checker, job)
+        verdict = cascade.decide(checker, job, checks) if cascade is not None else None
+        if verdict is not None:
+            result.update(verdict, response_text=verdict["explanation"])
+        elif llm is None:
+            verdict = fallback_verdict(checks)
+            result.update(verdict, response_text=verdict["explanation"], resolved_by="fallback")
+        else:
+            if stream is None:
+                from llm_cache import get_llm_cache
+                stream = get_llm_cache().generate_stream
+            timeout = DEFAULT_LLM_TIMEOUT if llm_timeout is None else llm_timeout
+            deadline = time.monotonic() + timeout
+            observe_size("prompt_chars", len(result["prompt"]))
+            chunks: "queue.Queue" = queue.Queue()
+            _llm_executor.submit(bind_trace(_pump_stream), stream, llm, result["prompt"], chunks)
+            parser = StreamingVerdictParser(checks["desc_analysis"], checks["source_verdict"])
+            while True:
+                try:
+                    kind, payload = chunks.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    increment("llm_timeouts")
+                    verdict = fallback_verdict(checks, timed_out=True)
+                    result.update(verdict, response_text=verdict["explanation"], llm_timed_out=True,
+                                  resolved_by="fallback")
+                    break
+                if kind == "error":
+                    raise payload
+                if kind == "done":
+                    result.update(parse_response(parser.text, checks["desc_analysis"],
+                                                 checks["in_verified_job_board"], checks["source_verdict"]),
+                                  response_text=parser.text, resolved_by="llm")
+                    break
+                parser.feed(payload)
+                yield dict(parser.verdict(), event="chunk", text=payload, response_text=parser.text)
+        _remember(checker, job, near_duplicates, combined_text, result)
+        _save(checker, job, llm, result_store, model_version, result)
+        _finish_trace(trace, result, cascade)
+        yield {"event": "result", "result": result}
+
+
+def _pump_stream(stream: Callable[[Any, str], Iterator[str]], llm: Any, prompt: str,
+                 chunks: "queue.Queue") -> None:
+    # Runs on a worker thread; after a timeout the reader is gone and the rest is dropped
+    try:
+        for chunk in stream(llm, prompt):
+            chunks.put(("chunk", chunk))
+    except Exception as error:
+        chunks.put(("error", error))
+    else:
+        chunks.put(("done", None))
+
+
+def _from_store(checker, job: Dict[str, str], llm: Any, result_store,
+                model_version: Optional[str]) -> Optional[Dict[str, Any]]:
+    if result_store is None:
+        return None
+    stored = result_store.get(job, _model_version(checker, model_version), checker.rules_version(),
+                              _llm_name(llm))
+    if stored is None:
+        return None
+    increment("result_store_hits")
+    return dict(stored, prompt=None, from_store=True, resolved_by="store")
+
+
+def _save(checker, job: Dict[str, str], llm: Any, result_store, model_version: Optional[str],
+          result: Dict[str, Any]) -> None:
+    # Timed-out verdicts are provisional, so the next submission gets another chance at the LLM
+    if result_store is not None and not result["llm_timed_out"]:
+        result_store.put(job, result, _model_version(checker, model_version), checker.rules_version(),
+                         _llm_name(llm))
+
+
+def _model_version(checker, model_version: Optional[str]) -> str:
+    return checker.model_version() if model_version is None else model_version
+
+
+def _llm_name(llm: Any) -> str:
+    if llm is None:
+        return ""
+    from llm_cache import model_name_of
+    return model_name_of(llm)
+
+
+def _remember(checker, job: Dict[str, str], near_duplicates, combined_text: Optional[str],
+              result: Dict[str, Any]) -> None:
+    if near_duplicates is not None and not result["llm_timed_out"]:
+        near_duplicates.insert(_content_key(combined_text), combined_text,
+                               dict({field: result[field] for field in _REUSABLE_FIELDS},
+                                    source=_source_checks(checker, job)))
+
+
+def _finish_trace(trace: Optional[Dict[str, Any]], result: Dict[str, Any], cascade=None) -> None:
+    if cascade is not None:
+        cascade.record(result["resolved_by"])
+    if trace is not None:
+        trace.update(prediction=result["prediction"], confidence=result["confidence"],
+                     llm_timed_out=result["llm_timed_out"], resolved_by=result["resolved_by"])
+
+
+def _content_key(combined_text: str) -> str:
+    return hashlib.sha256(combined_text.encode("utf-8")).hexdigest()
+
+
+# Rule results that must be unchanged for a near-duplicate's verdict to carry over
+_RULE_FIELDS = ("red_flag_matches", "suspicious_pattern_count", "suspicious_pattern_severity", "risk_score")
+
+
+def _source_checks(checker, job: Dict[str, str]) -> Dict[str, Any]:
+    # Where a posting was published and by whom; must also be unchanged for a verdict to carry over
+    job_url = job.get("job_url", "")
+    return {
+        "validate_url": checker.validate_url(job_url),
+        "in_verified_job_board": checker.verify_job_source(job_url),
+        "source_verdict": checker.source_verdict(job_url),
+        "company_name": " ".join(str(job.get("company_name") or "").lower().split()),
+    }
+
+
+def _reuse_duplicate(checker, job: Dict[str, str], match) -> Optional[Dict[str, Any]]:
+    if match is None:
+        return None
+    key, similarity, verdict = match
+    # A repost can add a scam sentence while staying similar, so the (cheap) rules always run on
+    # the new text; the old verdict is only reused when they find exactly what they found before
+    desc_analysis = checker.analyze_job_description(job.get("job_description", ""))
+    stored = verdict.get("desc_analysis") or {}
+    if (desc_analysis.get("risk_score", 0) >= 50
+            or any(desc_analysis.get(field) != stored.get(field) for field in _RULE_FIELDS)):
+        increment("near_duplicate_rule_mismatches")
+        return None
+    # Copying a real posting's text onto another site or company is a classic scam, so a
+    # changed source means a full analysis too
+    source = _source_checks(checker, job)
+    if source != verdict.get("source"):
+        increment("near_duplicate_source_mismatches")
+        return None
+    increment("near_duplicate_hits")
+    return dict({field: verdict[field] for field in _REUSABLE_FIELDS}, desc_analysis=desc_analysis,
+                validate_url=source["validate_url"], in_verified_job_board=source["in_verified_job_board"],
+                source_verdict=source["source_verdict"],
+                prompt=None, llm_timed_out=False, duplicate_of=key, similarity=similarity,
+                resolved_by="near_duplicate")
+
+
+def _analyze_posting(checker, job: Dict[str, str], llm: Any, generate: Optional[Callable[[Any, str], str]],
+                     llm_timeout: Optional[float], cascade=None) -> Dict[str, Any]:
+    checks, result = _prepare(checker, job)
+    prompt = result["prompt"]
+
+    verdict = cascade.decide(checker, job, checks) if cascade is not None else None
+    if verdict is not None:
+        result.update(verdict, response_text=verdict["explanation"])
+        return result
+
+    if llm is None:
+        verdict = fallback_verdict(checks)
+        result.update(verdict, response_text=verdict["explanation"], resolved_by="fallback")
+        return result
+
+    if generate is None:
+        from llm_cache import get_llm_cache
+        generate = get_llm_cache().generate
+    timeout = DEFAULT_LLM_TIMEOUT if llm_timeout is None else llm_timeout
+    observe_size("prompt_chars", len(prompt))
+    llm_future = _llm_executor.submit(bind_trace(generate), llm, prompt)
+    try:
+        response_text = llm_future.result(timeout=timeout)
+    except FutureTimeoutError:
+        increment("llm_timeouts")
+        verdict = fallback_verdict(checks, timed_out=True)
+        result.update(verdict, response_text=verdict["explanation"], llm_timed_out=True, resolved_by="fallback")
+        return result
+
+    result.update(parse_response(response_text, checks["desc_analysis"], checks["in_verified_job_board"],
+                                 checks["source_verdict"]),
+                  response_text=response_text, resolved_by="llm")
+    return result
+
+
+def _prepare(checker, job: Dict[str, str]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    checks = run_local_checks(checker, job)
+    prompt = build_prompt(job.get("job_title", ""), job.get("company_name", ""), job.get("job_url", ""),
+                          checks["validate_url"], checks["in_verified_job_board"],
+                          checks["desc_analysis"], checks["ml_prediction"], checks["source_verdict"])
+    return checks, dict(checks, prompt=prompt, response_text=None, llm_timed_out=False)
+
+
+async def analyze_posting_async(checker, job: Dict[str, str], **kwargs) -> Dict[str, Any]:
+    # For asyncio callers; the work itself runs on threads so the event loop stays free
+    import asyncio
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(analyze_posting, checker, job, **kwargs))
@@ -0,0 +1,139 @@
+"""Persistent store of analysis results (SQLite).
+
+Each row keeps the submitted fields, the full result (rule output, ML
+prediction, LLM verdict) and the versions that produced it: the model
+artifact hash, the rules version (a hash of RED_FLAGS and
+SUSPICIOUS_PATTERNS) and the LLM model name. ``get`` only returns rows made
+with the current versions, so changing the model or the rules invalidates
+older results without touching the file. ``purge_stale`` reclaims their
+space. Lookups by content hash, job URL and company name go through
+B-tree indexes.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# Posting fields that make up a submission (the app's names)
+INPUT_FIELDS = ("company_name", "job_title", "job_description", "job_url", "company_profile",
+                "requirements", "benefits")
+# Result fields not worth persisting (rebuilt from the inputs on demand)
+_SKIPPED_FIELDS = ("prompt",)
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS analyses ("
+    " content_hash TEXT NOT NULL, model_version TEXT NOT NULL, rules_version TEXT NOT NULL,"
+    " llm_model TEXT NOT NULL, job_url TEXT NOT NULL, company_name TEXT NOT NULL,"
+    " prediction TEXT, confidence INTEGER, risk_score INTEGER, ml_prediction INTEGER,"
+    " inputs TEXT NOT NULL, result TEXT NOT NULL, created REAL NOT NULL,"
+    " PRIMARY KEY (content_hash, model_version, rules_version, llm_model))",
+    "CREATE INDEX IF NOT EXISTS idx_analyses_job_url ON analyses(job_url, created)",
+    "CREATE INDEX IF NOT EXISTS idx_analyses_company ON analyses(company_name COLLATE NOCASE, created)",
+)
+
+
+def content_hash(job: Dict[str, str]) -> str:
+    """SHA-256 of the submitted fields, ignoring surrounding whitespace and missing fields."""
+    fields = {field: str(job.get(field) or "").strip() for field in INPUT_FIELDS}
+    return hashlib.sha256(json.dumps(fields, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ResultStore:
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        if path != ":memory:":
+            # Readers don't block the writer, so several app processes can share the file
+            self._db.execute("PRAGMA journal_mode=WAL")
+        for statement in _SCHEMA:
+            self._db.execute(statement)
+        self._db.commit()
+        self._lock = threading.Lock()
+
+    def get(self, job: Dict[str, str], model_version: str, rules_version: str,
+            llm_model: str = "") -> Optional[Dict[str, Any]]:
+        """The stored result for this exact submission under the given versions, or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT result, created FROM analyses WHERE content_hash = ? AND model_version = ?"
+                " AND rules_version = ? AND llm_model = ?",
+                (content_hash(job), model_version, rules_version, llm_model),
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(json.loads(row["result"]), stored_at=row["created"])
+
+    def put(self, job: Dict[str, str], result: Dict[str, Any], model_version: str, rules_version: str,
+            llm_model: str = "") -> str:
+        """Store ``result`` for ``job``, replacing an earlier one made with the same versions; returns the content hash."""
+        key = content_hash(job)
+        stored = {name: value for name, value in result.items()
+                  if name not in _SKIPPED_FIELDS and name != "stored_at"}
+        desc_analysis = result.get("desc_analysis") or {}
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO analyses (content_hash, model_version, rules_version, llm_model, job_url,"
+                " company_name, prediction, confidence, risk_score, ml_prediction, inputs, result, created)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, model_version, rules_version, llm_model, str(job.get("job_url") or "").strip(),
+                 str(job.get("company_name") or "").strip(), result.get("prediction"), result.get("confidence"),
+                 desc_analysis.get("risk_score"), result.get("ml_prediction"),
+                 json.dumps({field: job.get(field, "") for field in INPUT_FIELDS}),
+                 json.dumps(stored, default=str), time.time()),
+            )
+            self._db.commit()
+        return key
+
+    def _history(self, where: str, value: str, limit: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT * FROM analyses WHERE {where} ORDER BY created DESC LIMIT ?", (value, limit)
+            ).fetchall()
+        return [dict(row, inputs=json.loads(row["inputs"]), result=json.loads(row["result"])) for row in rows]
+
+    def by_job_url(self, job_url: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Past analyses of ``job_url``, newest first, across all versions."""
+        return self._history("job_url = ?", job_url.strip(), limit)
+
+    def by_company(self, company_name: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Past analyses for ``company_name`` (case-insensitive), newest first, across all versions."""
+        return self._history("company_name = ? COLLATE NOCASE", company_name.strip(), limit)
+
+    def by_content_hash(self, key: str, limit: int = 50) -> List[Dict[str, Any]]:
+        return self._history("content_hash = ?", key, limit)
+
+    def purge_stale(self, model_version: str, rules_version: str) -> int:
+        """Delete results made with another model or rules version; returns the number removed."""
+        with self._lock:
+            deleted = self._db.execute(
+                "DELETE FROM analyses WHERE model_version != ? OR rules_version != ?",
+                (model_version, rules_version),
+            ).rowcount
+            self._db.commit()
+        return deleted
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_store: Optional[ResultStore] = None
+_store_lock = threading.Lock()
+
+
+def get_result_store() -> ResultStore:
+    # Process-wide store; JOB_ANALYZER_RESULT_STORE sets the file (":memory:" keeps nothing across restarts)
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ResultStore(os.getenv("JOB_ANALYZER_RESULT_STORE", "analysis_results.db"))
+    return _store
@@ -0,0 +1,217 @@
+import hashlib
+import json
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Same definition of a word character as the regex \b used by the original rules
+_WORD_CHAR = re.compile(r'\w')
+
+
+def _is_word(text: str, index: int) -> bool:
+    return 0 <= index < len(text) and _WORD_CHAR.match(text[index]) is not None
+
+
+class PhraseMatcher:
+    """Aho-Corasick automaton matching every phrase in a single pass.
+
+    A phrase only counts when it sits on word boundaries, which reproduces
+    ``re.search(r'\\b' + re.escape(phrase) + r'\\b', text)`` for each phrase.
+    """
+
+    def __init__(self, phrases: Sequence[str]):
+        self.phrases = list(phrases)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        for index, phrase in enumerate(self.phrases):
+            if phrase:
+                self._add(phrase, index)
+        self._build_failure_links()
+        self._longest = max((len(phrase) for phrase in self.phrases), default=0)
+
+    def _add(self, phrase: str, index: int) -> None:
+        state = 0
+        for ch in phrase:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append(index)
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def _on_boundary(self, text: str, start: int, end: int) -> bool:
+        # \b before the phrase and after it
+        return (_is_word(text, start - 1) != _is_word(text, start)
+                and _is_word(text, end - 1) != _is_word(text, end))
+
+    def find_all(self, text: str, start: int = 0, stop: Optional[int] = None) -> List[int]:
+        """Return the indexes of matched phrases, in phrase-list order.
+
+        Only occurrences starting in ``text[start:stop]`` count; the characters
+        around that range still decide the word boundaries.
+        """
+        found = set()
+        goto, fail, out = self._goto, self._fail, self._out
+        stop = len(text) if stop is None else stop
+        # Occurrences ending past stop + longest phrase would start at or after stop
+        scanned = text if stop + self._longest >= len(text) else text[:stop + self._longest]
+        state = 0
+        for position, ch in enumerate(scanned):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for index in out[state]:
+                if index in found:
+                    continue
+                end = position + 1
+                begin = end - len(self.phrases[index])
+                if start <= begin < stop and self._on_boundary(text, begin, end):
+                    found.add(index)
+        return sorted(found)
+
+
+# Constructs that can match a newline or depend on what follows the piece; pieces
+# after the first are searched within one line, so they must not contain these
+_LINE_UNSAFE = re.compile(r'\\[sWDnZAB]|(?<!\\)\[\^|(?<!\\)\$|\(\?|\||(?<!\\)\.')
+# A trailing ``+`` on an atom that cannot match a newline: ``x+.*`` is the same as ``x.*``
+_TRAILING_PLUS = re.compile(r'(?:\\[dwS]|[^\\\]\)}*+?.|^])\+$')
+
+
+def _split_top_level(pattern: str) -> Optional[List[str]]:
+    # Split on ``.*`` outside of groups and classes; None when the pattern can't be split safely
+    parts, depth, in_class, start, i = [], 0, False, 0, 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == '\\':
+            i += 2
+            continue
+        if in_class:
+            in_class = ch != ']'
+        elif ch == '[':
+            in_class = True
+        elif ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        elif depth == 0 and pattern.startswith('.*', i):
+            parts.append(pattern[start:i])
+            i += 2
+            start = i
+            continue
+        i += 1
+    parts.append(pattern[start:])
+    if depth != 0 or in_class or not all(parts):
+        return None
+    if any('|' in part or '(?' in part for part in parts):
+        return None
+    if any(_LINE_UNSAFE.search(part) for part in parts[1:]):
+        return None
+    pieces = []
+    for part in parts[:-1]:
+        # The piece is matched as early as possible, so a trailing quantifier would
+        # swallow characters the next piece needs
+        if _TRAILING_PLUS.search(part):
+            part = part[:-1]
+        elif part.endswith(('*', '+', '?', '}')):
+            return None
+        pieces.append(part)
+    pieces.append(parts[-1])
+    return pieces
+
+
+class LinearPattern:
+    """Existence check for ``a.*b.*c`` style patterns without backtracking.
+
+    Each piece is searched once, left to right, starting where the previous
+    piece ended and staying on the same line (``.`` does not match a newline).
+    Taking the earliest match of each piece is always optimal, so the whole
+    check is linear in the text length.
+    """
+
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        parts = _split_top_level(pattern)
+        if parts is None or len(parts) == 1:
+            self._pieces = [re.compile(pattern)]
+        else:
+            self._pieces = [re.compile(part) for part in parts]
+
+    @property
+    def pieces(self) -> List["re.Pattern"]:
+        # Compiled pieces in order; a single one when the pattern could not be split
+        return self._pieces
+
+    def search(self, text: str) -> bool:
+        first, rest = self._pieces[0], self._pieces[1:]
+        position = 0
+        while True:
+            match = first.search(text, position)
+            if match is None:
+                return False
+            if not rest:
+                return True
+            line_end = text.find('\n', match.end())
+            if line_end == -1:
+                line_end = len(text)
+            cursor = match.end()
+            for piece in rest:
+                piece_match = piece.search(text, cursor, line_end)
+                if piece_match is None:
+                    break
+                cursor = piece_match.end()
+            else:
+                return True
+            # No later start on this line can do better, move to the next one
+            if line_end == len(text):
+                return False
+            position = line_end + 1
+
+
+class RuleEngine:
+    def __init__(self, red_flags: Sequence[str], suspicious_patterns: Sequence[Tuple[str, int]]):
+        self.red_flags = list(red_flags)
+        self.phrase_matcher = PhraseMatcher(self.red_flags)
+        self.patterns = [(LinearPattern(pattern), severity) for pattern, severity in suspicious_patterns]
+
+    def match_red_flags(self, text: str) -> List[str]:
+        return [self.red_flags[index] for index in self.phrase_matcher.find_all(text)]
+
+    def match_patterns(self, text: str) -> Tuple[int, int]:
+        pattern_count = 0
+        severity_total = 0
+        for pattern, severity in self.patterns:
+            if pattern.search(text):
+                pattern_count += 1
+                severity_total += severity
+        return pattern_count, severity_total
+
+
+@lru_cache(maxsize=None)
+def get_rule_engine(red_flags: Tuple[str, ...],
+                    suspicious_patterns: Tuple[Tuple[str, int], ...]) -> RuleEngine:
+    # Compiled once per distinct rule set (i.e. once per checker class)
+    return RuleEngine(red_flags, suspicious_patterns)
+
+
+@lru_cache(maxsize=None)
+def rules_version(red_flags: Tuple[str, ...], suspicious_patterns: Tuple[Tuple[str, int], ...]) -> str:
+    # Short stable hash of the rule lists; changes whenever a rule or severity does
+    payload = json.dumps([list(red_flags), [list(rule) for rule in suspicious_patterns]])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
@@ -0,0 +1,111 @@
+"""Load-test client for scoring_server.py.
+
+    python scoring_loadtest.py --url http://127.0.0.1:8765 --concurrency 32 --requests 5000
+
+Sends postings from concurrent threads and prints throughput, latency
+percentiles and the server's mean batch size.
+"""
+import argparse
+import json
+import threading
+import time
+import urllib.request
+from typing import Dict, List, Optional
+
+SAMPLE_POSTINGS = [
+    {
+        "job_title": "Software Engineer",
+        "company_name": "Acme Corporation",
+        "job_description": "We are looking for a Software Engineer with 3-5 years of experience. "
+                           "Competitive salary and benefits package. Please submit your resume.",
+        "job_url": "https://www.indeed.com/viewjob?jk=123",
+        "company_profile": "Leading tech company",
+        "requirements": "Python, SQL, cloud experience",
+        "benefits": "Health insurance, 401k",
+    },
+    {
+        "job_title": "Data Entry Clerk",
+        "company_name": "Quick Cash Ltd",
+        "job_description": "Guaranteed income! Easy money with no experience needed. "
+                           "Pay upfront via Western Union. $5k per week!",
+        "job_url": "http://quick-cash-jobs.biz/apply",
+        "company_profile": "",
+        "requirements": "None",
+        "benefits": "Instant payment",
+    },
+]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _post(url: str, payload: Dict[str, str]) -> None:
+    request = urllib.request.Request(url, data=json.dumps(payload).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request) as response:
+        response.read()
+
+
+def run(url: str, concurrency: int = 16, total_requests: int = 2000) -> Dict[str, float]:
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    counter = iter(range(total_requests))
+
+    def worker() -> None:
+        local = []
+        while True:
+            with lock:
+                index = next(counter, None)
+            if index is None:
+                break
+            started = time.perf_counter()
+            try:
+                _post(url.rstrip("/") + "/score", SAMPLE_POSTINGS[index % len(SAMPLE_POSTINGS)])
+            except Exception:
+                with lock:
+                    errors[0] += 1
+                continue
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    with urllib.request.urlopen(url.rstrip("/") + "/health") as response:
+        health = json.loads(response.read())
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p90_ms": percentile(latencies, 0.90) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "mean_batch_size": health.get("mean_batch_size", 0.0),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Load-test the local scoring server.")
+    parser.add_argument("--url", default="http://127.0.0.1:8765")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args(argv)
+    report = run(args.url, args.concurrency, args.requests)
+    for key, value in report.items():
+        print(f"{key:>16}: {value:,.2f}" if isinstance(value, float) else f"{key:>16}: {value}")
+
+
+if __name__ == "__main__":
+    main()
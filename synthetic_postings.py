@@ -0,0 +1,92 @@
+import random
+from typing import Dict, Iterator, List, Optional
+
+KINDS = ("short", "long", "scam", "adversarial")
+
+_TITLES = ["Software Engineer", "Data Analyst", "Customer Support Agent", "Marketing Manager",
+           "Data Entry Clerk", "Registered Nurse", "Warehouse Associate", "Product Designer"]
+_COMPANIES = ["Acme Corporation", "Globex", "Initech", "Umbrella Health", "Quick Cash Ltd", "Stark Logistics"]
+_LEGIT_URLS = ["https://www.indeed.com/viewjob?jk={n}", "https://www.linkedin.com/jobs/view/{n}",
+               "https://careers.acme.example.com/jobs/{n}", "https://www.glassdoor.com/job-listing/{n}"]
+_SCAM_URLS = ["http://quick-cash-jobs.biz/apply/{n}", "https://indeed.com.jobs-offer.xyz/{n}",
+              "http://bit.ly/{n}", "http://localhost/{n}", "not a url {n}"]
+_LEGIT_SENTENCES = [
+    "We are looking for a motivated professional to join our growing team.",
+    "You will collaborate with cross-functional partners to deliver high quality work.",
+    "Candidates should have 3-5 years of relevant experience and strong communication skills.",
+    "We offer a competitive salary, health insurance and a 401k match.",
+    "Please submit your resume and a short cover letter through our careers page.",
+    "The role is hybrid, with two days a week in our downtown office.",
+    "You will report to the engineering manager and mentor junior colleagues.",
+    "Experience with Python, SQL and cloud platforms is a plus.",
+]
+_SCAM_SENTENCES = [
+    "Guaranteed income with no experience needed!",
+    "Easy money, work from home, earn instantly.",
+    "Earn $45 per hour from your couch, no interview required.",
+    "Make $5k per week with this private opportunity.",
+    "Pay upfront for your training kit via Western Union or MoneyGram.",
+    "We need your bank details to set up instant payment.",
+    "Limited time offer: no investment, just a small upfront fee.",
+    "Get paid in bitcoin or crypto immediately. Urgent hiring, apply ASAP.",
+]
+
+
+def _description(rng: random.Random, kind: str) -> str:
+    if kind == "short":
+        return " ".join(rng.sample(_LEGIT_SENTENCES, 2))
+    if kind == "long":
+        return "\n".join(" ".join(rng.choices(_LEGIT_SENTENCES, k=6)) for _ in range(40))
+    if kind == "scam":
+        sentences = rng.sample(_SCAM_SENTENCES, 4) + rng.sample(_LEGIT_SENTENCES, 2)
+        rng.shuffle(sentences)
+        return " ".join(sentences)
+    if kind == "adversarial":
+        # Near-misses for the rule patterns on one long line: many "earn $N" and
+        # "need"/"bank" prefixes whose suffix never arrives, which is where a
+        # backtracking regex engine degrades quadratically
+        pieces = [rng.choice(["earn $%d " % rng.randint(1, 99), "need bank ", "$%dk per " % rng.randint(1, 9),
+                              "limited time ", "no ", "upfront "]) for _ in range(3000)]
+        return "".join(pieces)
+    raise ValueError(f"unknown posting kind: {kind}")
+
+
+def generate_posting(rng: random.Random, kind: str, n: int = 0) -> Dict[str, str]:
+    scammy = kind in ("scam", "adversarial")
+    url = rng.choice(_SCAM_URLS if scammy else _LEGIT_URLS).format(n=n)
+    return {
+        "company_name": rng.choice(_COMPANIES),
+        "job_title": rng.choice(_TITLES),
+        "job_description": _description(rng, kind),
+        "job_url": url,
+        "company_profile": "" if scammy else "Leading company in its field since 1998.",
+        "requirements": "None" if scammy else "Bachelor's degree or equivalent experience.",
+        "benefits": "Instant payment" if scammy else "Health, dental and vision insurance.",
+    }
+
+
+def generate_postings(count: int, kind: Optional[str] = None, seed: int = 0) -> Iterator[Dict[str, str]]:
+    """Yield ``count`` deterministic synthetic postings of ``kind`` (or a mix of all kinds)."""
+    rng = random.Random(seed)
+    for n in range(count):
+        yield generate_posting(rng, kind or KINDS[n % len(KINDS)], n)
+
+
+def generate_llm_responses(count: int, seed: int = 0) -> List[str]:
+    # Mix of the response shapes app.main has to parse: JSON, plain text and free text
+    rng = random.Random(seed)
+    responses = []
+    for n in range(count):
+        prediction = rng.choice(["Legitimate", "Suspicious"])
+        confidence = rng.randint(0, 100)
+        shape = n % 3
+        if shape == 0:
+            responses.append('Here is my analysis:\n{"prediction": "%s", "confidence": %d, '
+                             '"negative_indicators": ["pay_upfront"], "positive_indicators": [], '
+                             '"explanation": "%s"}' % (prediction, confidence, "Detailed reasoning. " * 20))
+        elif shape == 1:
+            responses.append(f"Prediction: {prediction}\n\nConfidence: {confidence}%\n\n"
+                             f"Explanation: {'Detailed reasoning. ' * 40}")
+        else:
+            responses.append(f"Prediction: {prediction}\n\nExplanation: {'No explicit score given. ' * 40}")
+    return responses
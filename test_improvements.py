@@ -26,3 +26,311 @@ print("Test 3 - URL Validation:")
 print(f"  Valid URL (with TLD): {j.validate_url('https://example.com/job')}")
 print(f"  Invalid URL (no TLD): {j.validate_url('https://localhost/job')}")
 print(f"  Invalid URL (no scheme): {j.validate_url('example.com')}")
+print()
+
+# Test 4: Compiled rule engine matches the original per-rule regex search
+import re
+
+def legacy_rules(text):
+    text = text.lower()
+    flags = [f for f in j.RED_FLAGS if re.search(r'\b' + re.escape(f) + r'\b', text)]
+    hits = [severity for pattern, severity in j.SUSPICIOUS_PATTERNS if re.search(pattern, text)]
+    return flags, len(hits), sum(hits)
+
+engine_samples = [
+    scam_text,
+    legit_text,
+    "Earn $40 per\nhour. Need your bank\ndetails ASAP!",
+    "Limited time offer: crypto bonus, no upfront fee, no investment needed.",
+    "Work from home, earn instantly! Confidential, private opportunity via MoneyGram.",
+]
+print("Test 4 - Rule Engine Equivalence:")
+for sample in engine_samples:
+    result = j.analyze_job_description(sample)
+    expected = legacy_rules(sample)
+    actual = (result['red_flag_matches'], result['suspicious_pattern_count'], result['suspicious_pattern_severity'])
+    assert actual == expected, (sample, actual, expected)
+print(f"  {len(engine_samples)} samples match the legacy regex rules")
+print()
+
+# Test 5: Module-level preprocessor matches the original nested preprocess_text
+from nltk.corpus import stopwords
+from text_preprocessing import preprocess_text, preprocess_many
+
+def legacy_preprocess_text(text):
+    if not text:
+        return ""
+    text = text.lower()
+    text = re.sub(r'\d+', '', text)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'[^\w\s]', '', text)
+    text = [word for word in text.split() if word not in stopwords.words('english')]
+    return ' '.join(text)
+
+preprocess_samples = engine_samples + [
+    "", "   ", "I don't think THE 3rd-party's offer is legit!!!",
+    "Salary: $120,000/yr\t\nRemote — café_staff wanted\x1cnow",
+]
+print("Test 5 - Preprocessing Equivalence:")
+for sample in preprocess_samples:
+    assert preprocess_text(sample) == legacy_preprocess_text(sample), sample
+assert preprocess_many(preprocess_samples) == [legacy_preprocess_text(s) for s in preprocess_samples]
+print(f"  {len(preprocess_samples)} samples match the legacy preprocessing")
+print()
+
+# Test 6: Job source verification matches host suffixes, not substrings
+print("Test 6 - Job Source Verification:")
+source_cases = {
+    "https://www.indeed.com/viewjob?jk=1": True,
+    "https://uk.indeed.com/viewjob?jk=1": True,
+    "https://indeed.com.evil.io/viewjob": False,
+    "https://notindeed.com/jobs": False,
+    "https://www.linkedin.com/jobs/view/1": True,
+    "https://www.linkedin.com/in/someone": False,
+}
+for url, expected in source_cases.items():
+    assert j.verify_job_source(url) == expected, url
+    print(f"  {j.source_verdict(url):<8} {url}")
+print()
+
+# Test 7: Windowed scan of large descriptions matches the single-pass rules
+from large_input import scan_stream
+
+print("Test 7 - Windowed Rule Scan:")
+for sample in engine_samples:
+    long_sample = (sample + " filler text\n") * 7
+    expected = legacy_rules(long_sample)
+    for window_chars in (5, 17, 64):
+        scan = scan_stream(j.rule_engine(), [long_sample], window_chars=window_chars, overlap=8)
+        actual = (scan['red_flag_matches'], scan['suspicious_pattern_count'], scan['suspicious_pattern_severity'])
+        assert actual == expected, (sample, window_chars, actual, expected)
+truncated = scan_stream(j.rule_engine(), ["x " * 50, "pay upfront"], limit=100)
+assert truncated['truncated'] and truncated['red_flag_matches'] == []
+print(f"  {len(engine_samples)} samples match across window sizes; scans stop at the limit")
+print()
+
+# Test 8: Importing the checker stays cheap (no scikit-learn, NLTK or network at import time)
+from import_budget import heavy_imports, import_profile
+
+print("Test 8 - Lazy Imports:")
+for module in ("joblegitchecker2", "near_duplicates"):
+    import_ms, imported = import_profile(module)
+    assert heavy_imports(imported) == [], (module, heavy_imports(imported))
+    print(f"  {module} imports in {import_ms:.0f} ms without heavy modules")
+print()
+
+# Test 9: A near-duplicate repost only reuses the old verdict when the rules agree
+import random
+from near_duplicates import NearDuplicateIndex
+from orchestrator import _reuse_duplicate, _source_checks, analyze_posting, ml_input
+
+print("Test 9 - Near-Duplicate Reuse:")
+rng = random.Random(0)
+vocab = ("design build scalable services python review mentor production observability platform data team "
+         "ship features customers reliability latency storage queues metrics dashboards incidents").split()
+original = {"job_title": "Backend Engineer", "job_url": "https://www.indeed.com/viewjob?jk=1",
+            "job_description": " ".join(rng.choice(vocab) for _ in range(400))}
+repost = dict(original, job_description=original["job_description"]
+              + " Pay an upfront fee via Western Union or bitcoin, send bank details.")
+index = NearDuplicateIndex()
+index.insert("original", j.combine_text(ml_input(original)),
+             {"desc_analysis": j.analyze_job_description(original["job_description"]), "ml_prediction": 1,
+              "prediction": "Legitimate", "confidence": 95, "explanation": "", "positive_indicators": [],
+              "negative_indicators": [], "response_text": "", "source": _source_checks(j, original)})
+match = index.query(j.combine_text(ml_input(repost)))
+assert match is not None and _reuse_duplicate(j, repost, match) is None
+assert _reuse_duplicate(j, original, index.query(j.combine_text(ml_input(original))))["prediction"] == "Legitimate"
+assert index.query("") is None and index.query("engineer") is None
+# The same text copied onto another company and an invalid URL is analysed in full
+copied = dict(original, company_name="Quick Hire Ltd", job_url="http://not a url")
+assert _reuse_duplicate(j, copied, index.query(j.combine_text(ml_input(copied)))) is None
+assert _reuse_duplicate(j, dict(original, job_url="https://jobs.example.org/1"),
+                        index.query(j.combine_text(ml_input(original)))) is None
+fresh_index = NearDuplicateIndex()
+analyze_posting(j, original, near_duplicates=fresh_index)
+assert analyze_posting(j, original, near_duplicates=fresh_index)["resolved_by"] == "near_duplicate"
+assert analyze_posting(j, copied, near_duplicates=fresh_index)["resolved_by"] != "near_duplicate"
+print(f"  repost at {match[1]:.2f} similarity with new red flags is re-analysed; shingle-less texts never match; "
+      f"copies under another URL or company are re-analysed")
+print()
+
+# Test 10: The compiled linear scorer gives the same labels as the sklearn model, and scores to float32 precision
+import os
+import pickle
+import tempfile
+import numpy as np
+from linear_scorer import CompiledScorer, export
+from synthetic_postings import KINDS, generate_postings
+
+print("Test 10 - Compiled Scorer Equivalence:")
+postings = list(generate_postings(200, seed=1))
+texts = [j.combine_text(ml_input(posting)) for posting in postings]
+# The shipped vectorizer (the checker replaces it with an unfitted one when model.pkl is missing)
+with open("tfidf_vectorizer.pkl", "rb") as vec_file:
+    vectorizer = pickle.load(vec_file)
+if os.path.exists("model.pkl"):
+    with open("model.pkl", "rb") as model_file:
+        model = pickle.load(model_file)
+else:
+    # No model is shipped: fit one on the vectorizer's features (generate_postings cycles KINDS)
+    from sklearn.linear_model import LogisticRegression
+    labels = [0 if KINDS[n % len(KINDS)] in ("scam", "adversarial") else 1 for n in range(len(texts))]
+    model = LogisticRegression(max_iter=1000).fit(vectorizer.transform(texts), labels)
+sample = texts[::3] + [j.combine_text(ml_input({"job_title": "Clerk", "job_description": scam_text})),
+                       j.combine_text(ml_input({"job_title": "Engineer", "job_description": legit_text}))]
+features = vectorizer.transform(sample)
+with tempfile.TemporaryDirectory() as out_dir:
+    export(vectorizer, model, out_dir)
+    scorer = CompiledScorer(out_dir)
+    compiled = np.array([scorer.decision_function(text) for text in sample])
+    assert np.allclose(compiled, model.decision_function(features), rtol=0, atol=1e-5)
+    if scorer.meta["logistic_proba"]:
+        compiled_proba = np.array([scorer.predict_proba(text) for text in sample])
+        assert np.allclose(compiled_proba, model.predict_proba(features), rtol=0, atol=1e-5)
+    assert [scorer.predict(text) for text in sample] == list(model.predict(features))
+    compiled_size = sum(os.path.getsize(os.path.join(out_dir, name)) for name in os.listdir(out_dir))
+    assert compiled_size < os.path.getsize("tfidf_vectorizer.pkl"), compiled_size
+print(f"  {len(sample)} postings score within 1e-5 of the sklearn model with identical labels "
+      f"({compiled_size / 1024:.0f} KiB compiled)")
+print()
+
+# Test 11: Stored results are keyed by the model artifacts the checker actually loaded
+from orchestrator import analyze_posting
+from result_store import ResultStore
+
+print("Test 11 - Model Version:")
+with tempfile.TemporaryDirectory() as artifact_dir:
+    model_path = os.path.join(artifact_dir, "model.pkl")
+    with open(model_path, "wb") as model_file:
+        pickle.dump(model, model_file)
+    fitted = JobLegitimacyChecker(model_path=model_path)
+    assert fitted.model_version() == JobLegitimacyChecker(model_path=model_path).model_version()
+    assert fitted.model_version() != j.model_version()
+    store = ResultStore(":memory:")
+    job = {"job_title": "Software Engineer", "job_description": legit_text}
+    assert not analyze_posting(j, job, result_store=store).get("from_store")
+    assert analyze_posting(j, job, result_store=store).get("from_store")
+    assert not analyze_posting(fitted, job, result_store=store).get("from_store")
+    assert not analyze_posting(j, job, result_store=store, model_version="pinned").get("from_store")
+print(f"  unfitted {j.model_version()} and fitted {fitted.model_version()} keep separate stored results")
+print()
+
+# Test 12: One malformed posting only fails its own request in a scoring-server batch
+from scoring_server import MicroBatcher
+
+print("Test 12 - Micro-Batch Isolation:")
+batcher = MicroBatcher(fitted, max_wait_ms=200)
+futures = [batcher.submit({"job_title": "Clerk", "benefits": 5}),
+           batcher.submit({"job_title": "Clerk", "benefits": ["not", "text"]}),
+           batcher.submit({"job_title": "Engineer", "job_description": legit_text})]
+assert futures[2].result()["ml_prediction"] == fitted.predict_with_proba(ml_input(
+    {"job_title": "Engineer", "job_description": legit_text}))[0]
+assert all(future.exception() is not None for future in futures[:2])
+batcher.close()
+print("  malformed postings fail alone; the rest of the batch is scored")
+print()
+
+# Test 13: A blocked job domain makes every verdict Suspicious
+from decision_cascade import DecisionCascade
+from domain_index import BLOCK, DomainIndex
+from llm_analysis import parse_response
+from orchestrator import run_local_checks
+
+print("Test 13 - Blocked Domains:")
+blocked_job = {"job_title": "Engineer", "company_name": "Acme", "job_description": legit_text,
+               "job_url": "https://careers.scam-jobs.biz/apply"}
+blocking = fitted
+assert analyze_posting(blocking, blocked_job)["prediction"] == "Legitimate"
+blocking.domain_index.update(["scam-jobs.biz"], BLOCK)
+checks = run_local_checks(blocking, blocked_job)
+assert checks["source_verdict"] == BLOCK
+assert analyze_posting(blocking, blocked_job)["prediction"] == "Suspicious"
+blocked_verdict = parse_response("Prediction: Legitimate\n\nConfidence: 95%", checks["desc_analysis"], False, BLOCK)
+assert (blocked_verdict["prediction"], blocked_verdict["confidence"]) == ("Suspicious", 0)
+assert DecisionCascade().decide(blocking, blocked_job, dict(checks, ml_probability=0.99))["resolved_by"] == "rules"
+with tempfile.TemporaryDirectory() as index_dir:
+    DomainIndex().save(os.path.join(index_dir, "empty.idx"))
+    assert len(DomainIndex.load(os.path.join(index_dir, "empty.idx"))) == 0
+print("  blocked URLs are Suspicious in the fallback, LLM and cascade paths; empty indexes round-trip")
+print()
+
+# Test 14: Batched predictions are identical to the single-item path
+print("Test 14 - Batched Predictions:")
+batch_postings = [ml_input(posting) for posting in generate_postings(50, seed=4)]
+batch_predictions, batch_probabilities = fitted.predict_many(batch_postings, batch_size=16)
+for data, prediction, probability in zip(batch_postings, batch_predictions, batch_probabilities):
+    assert fitted.preprocess_and_predict(data) == prediction
+    assert fitted.predict_with_proba(data) == (prediction, probability)
+fallback_predictions, fallback_probabilities = j.predict_many(batch_postings[:3], batch_size=2)
+assert list(fallback_predictions) == [0, 0, 0] and np.isnan(fallback_probabilities).all()
+assert j.predict_with_proba(batch_postings[0]) == (0, None)
+print(f"  {len(batch_postings)} postings in batches of 16 match predict_with_proba; unscored rows get NaN")
+print()
+
+# Test 15: The streaming parser reports a verdict only once it has fully arrived
+from llm_analysis import StreamingVerdictParser
+
+print("Test 15 - Streaming Verdict Parser:")
+parser = StreamingVerdictParser({"risk_score": 0})
+seen = []
+for chunk in ["Predic", "tion: Legit", "imate\n\nConfid", "ence: 8", "5%", "\n\nExplanation: ..."]:
+    parser.feed(chunk)
+    seen.append((parser.verdict()["prediction"], parser.verdict()["confidence"]))
+assert seen == [(None, None), (None, None), ("Legitimate", None), ("Legitimate", None),
+                ("Legitimate", 85), ("Legitimate", 85)], seen
+parser = StreamingVerdictParser({"risk_score": 0})
+parser.feed('{"prediction": "Legitimate", "confidence": 8')
+assert parser.verdict() == {"prediction": "Legitimate", "confidence": None}
+parser.feed('5, "explanation": "')
+assert parser.verdict() == {"prediction": "Legitimate", "confidence": 85}
+risky = StreamingVerdictParser({"risk_score": 60})
+risky.feed('{"prediction": "Legitimate", "confidence": 90, ')
+assert risky.verdict() == {"prediction": "Suspicious", "confidence": 0}
+plain = StreamingVerdictParser({"risk_score": 60})
+plain.feed("Prediction: Legitimate\n\nConfidence: 90%")
+# Plain-text verdicts are provisional until parse_response runs on the full text
+assert plain.verdict() == {"prediction": "Legitimate", "confidence": 90}
+print("  split fields, unterminated confidences and the JSON risk override behave as parse_response will")
+print()
+
+# Test 16: The decision cascade resolves each tier exactly at its thresholds
+print("Test 16 - Decision Cascade Tiers:")
+cascade = DecisionCascade(rule_threshold=50, legit_threshold=0.85, suspicious_threshold=0.15, top_terms=0)
+tier_job = {"job_title": "Engineer", "job_description": legit_text}
+
+def tier_checks(risk_score, probability):
+    return {"desc_analysis": {"risk_score": risk_score, "red_flag_matches": [], "suspicious_pattern_count": 0},
+            "ml_probability": probability, "validate_url": True, "in_verified_job_board": False}
+
+tier_cases = [
+    ((50, 0.99), ("rules", "Suspicious", 0)),
+    ((49, 0.85), ("ml", "Legitimate", 85)),
+    ((49, 0.15), ("ml", "Suspicious", 15)),
+    ((0, 0.8499), None),
+    ((0, 0.1501), None),
+    ((49, None), None),
+]
+for (risk_score, probability), expected in tier_cases:
+    decided = cascade.decide(j, tier_job, tier_checks(risk_score, probability))
+    actual = None if decided is None else (decided["resolved_by"], decided["prediction"], decided["confidence"])
+    assert actual == expected, (risk_score, probability, actual)
+    cascade.record("llm" if decided is None else decided["resolved_by"])
+cascade_stats = cascade.stats()
+assert cascade_stats["total"] == 6
+assert cascade_stats["counts"]["rules"] == 1 and cascade_stats["counts"]["ml"] == 2
+assert cascade_stats["fractions"]["llm"] == 0.5 and cascade_stats["fractions"]["store"] == 0.0
+assert abs(sum(cascade_stats["fractions"].values()) - 1.0) < 1e-12
+print(f"  {len(tier_cases)} boundary cases resolve at the expected tier; stats fractions sum to 1")
+print()
+
+# Test 17: The fallback explanation only mentions a timeout when the LLM actually timed out
+import time as time_module
+
+print("Test 17 - Fallback Wording:")
+no_llm = analyze_posting(j, tier_job)
+assert no_llm["resolved_by"] == "fallback" and not no_llm["llm_timed_out"]
+assert "not available in time" not in no_llm["explanation"], no_llm["explanation"]
+slow = analyze_posting(j, tier_job, llm=object(), generate=lambda llm, prompt: time_module.sleep(1) or "",
+                       llm_timeout=0.05)
+assert slow["llm_timed_out"] and "not available in time" in slow["explanation"], slow["explanation"]
+print("  no-LLM and timed-out fallbacks explain themselves differently")
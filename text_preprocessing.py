@@ -0,0 +1,40 @@
+import re
+from typing import FrozenSet, Iterable, List
+
+# Digits and punctuation are both deleted outright, so one pass removes them together.
+# Whitespace runs don't need collapsing: str.split() already splits on any run of it.
+_STRIP_CHARS = re.compile(r'[^\w\s]|\d')
+
+# NLTK's English stopword list (nltk 3.9.1), the one the shipped model was trained with.
+# Bundled so that nothing is downloaded and NLTK is not imported at startup.
+ENGLISH_STOPWORDS: FrozenSet[str] = frozenset((
+    'i', 'me', 'my', 'myself', 'we', 'our', 'ours', 'ourselves', 'you', "you're", "you've",
+    "you'll", "you'd", 'your', 'yours', 'yourself', 'yourselves', 'he', 'him', 'his', 'himself',
+    'she', "she's", 'her', 'hers', 'herself', 'it', "it's", 'its', 'itself', 'they', 'them',
+    'their', 'theirs', 'themselves', 'what', 'which', 'who', 'whom', 'this', 'that', "that'll",
+    'these', 'those', 'am', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has',
+    'had', 'having', 'do', 'does', 'did', 'doing', 'a', 'an', 'the', 'and', 'but', 'if', 'or',
+    'because', 'as', 'until', 'while', 'of', 'at', 'by', 'for', 'with', 'about', 'against',
+    'between', 'into', 'through', 'during', 'before', 'after', 'above', 'below', 'to', 'from',
+    'up', 'down', 'in', 'out', 'on', 'off', 'over', 'under', 'again', 'further', 'then', 'once',
+    'here', 'there', 'when', 'where', 'why', 'how', 'all', 'any', 'both', 'each', 'few', 'more',
+    'most', 'other', 'some', 'such', 'no', 'nor', 'not', 'only', 'own', 'same', 'so', 'than',
+    'too', 'very', 's', 't', 'can', 'will', 'just', 'don', "don't", 'should', "should've", 'now',
+    'd', 'll', 'm', 'o', 're', 've', 'y', 'ain', 'aren', "aren't", 'couldn', "couldn't", 'didn',
+    "didn't", 'doesn', "doesn't", 'hadn', "hadn't", 'hasn', "hasn't", 'haven', "haven't", 'isn',
+    "isn't", 'ma', 'mightn', "mightn't", 'mustn', "mustn't", 'needn', "needn't", 'shan', "shan't",
+    'shouldn', "shouldn't", 'wasn', "wasn't", 'weren', "weren't", 'won', "won't", 'wouldn',
+    "wouldn't",
+))
+
+
+def preprocess_text(text: str) -> str:
+    """Lowercase, drop digits and punctuation, and remove English stopwords."""
+    if not text:
+        return ""
+    words = _STRIP_CHARS.sub('', text.lower()).split()
+    return ' '.join([word for word in words if word not in ENGLISH_STOPWORDS])
+
+
+def preprocess_many(texts: Iterable[str]) -> List[str]:
+    return [preprocess_text(text) for text in texts]